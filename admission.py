@@ -0,0 +1,108 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class Overloaded(Exception):
+    """Raised when a parse can't be admitted; retry_after is a hint in whole seconds."""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"parse admission refused ({reason})")
+        self.reason = reason  # "queue_full" or "timeout"
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """One caller's place in an AdmissionController, from enqueue until release."""
+
+    __slots__ = ("client", "granted", "enqueued_at", "started_at", "released")
+
+    def __init__(self, client):
+        self.client = client
+        self.granted = False
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.released = False
+
+
+class AdmissionController:
+    """Bounds how many parses run at once and how many may wait for a turn.
+
+    At most max_active tickets are granted at a time. Up to max_queued more
+    wait, grouped by client and granted round-robin across clients, so one
+    client with many queued parses gets every other turn rather than all of
+    them. Anything past that is refused with Overloaded at once. on_wait,
+    if given, is called with the seconds each granted ticket waited.
+    """
+
+    def __init__(self, max_active, max_queued, on_wait=None):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.on_wait = on_wait
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        self._waiting = OrderedDict()  # client -> deque of Tickets; the first client is served next
+        self._mean_hold = 1.0  # moving average of seconds a ticket is held, for Retry-After
+
+    def enqueue(self, client):
+        """Return a Ticket, granted at once if a slot is free; raise Overloaded if the queue is full."""
+        ticket = Ticket(client)
+        with self._cond:
+            if self._active < self.max_active and not self._queued:
+                self._start(ticket)
+            elif self._queued >= self.max_queued:
+                raise Overloaded("queue_full", self._retry_after_locked())
+            else:
+                self._waiting.setdefault(client, deque()).append(ticket)
+                self._queued += 1
+        return ticket
+
+    def wait(self, ticket, timeout=None):
+        """Block until ticket is granted; after timeout seconds it leaves the queue and Overloaded is raised."""
+        with self._cond:
+            if not self._cond.wait_for(lambda: ticket.granted, timeout):
+                tickets = self._waiting[ticket.client]
+                tickets.remove(ticket)
+                if not tickets:
+                    del self._waiting[ticket.client]
+                self._queued -= 1
+                raise Overloaded("timeout", self._retry_after_locked())
+        if self.on_wait:
+            self.on_wait(ticket.started_at - ticket.enqueued_at)
+        return ticket
+
+    def acquire(self, client, timeout=None):
+        """enqueue and wait in one call."""
+        return self.wait(self.enqueue(client), timeout)
+
+    def release(self, ticket):
+        """Give a granted ticket's slot to the next client in turn; repeated calls are no-ops."""
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            self._active -= 1
+            self._mean_hold += 0.2 * (time.monotonic() - ticket.started_at - self._mean_hold)
+            self._grant()
+
+    def _start(self, ticket):
+        ticket.granted = True
+        ticket.started_at = time.monotonic()
+        self._active += 1
+
+    def _grant(self):
+        while self._active < self.max_active and self._waiting:
+            client, tickets = next(iter(self._waiting.items()))
+            self._start(tickets.popleft())
+            self._queued -= 1
+            if tickets:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+        self._cond.notify_all()
+
+    def _retry_after_locked(self):
+        # Roughly how long until the queue has moved along enough to take another caller
+        return max(1, math.ceil(self._mean_hold * (self._queued // self.max_active + 1)))
@@ -1,12 +1,197 @@
+import io
 import os
-import base64
-from flask import Flask, request, redirect, url_for, flash, render_template
+import hashlib
+import re
+import json
+import time
+import mimetypes
+import multiprocessing
+import threading
+import click
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask import (
+    Flask, Response, request, redirect, url_for, flash, render_template, send_from_directory, abort,
+    jsonify, stream_with_context, stream_template, g, send_file, after_this_request,
+)
+from lxml.etree import XMLSyntaxError
 from pptx import Presentation
+from pptx.enum.shapes import PP_PLACEHOLDER
 from pptx.exc import PackageNotFoundError
-from zipfile import BadZipFile
+from pptx.shapes.group import GroupShape
+from pptx.shapes.picture import Picture
+from zipfile import BadZipFile, ZipFile, ZIP_STORED, ZIP_DEFLATED
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.wsgi import wrap_file
+from parse_cache import ParseCache
+from jobs import JobQueue
+from admission import AdmissionController, Overloaded
+from singleflight import SingleFlight
+from renderers import slide_to_html, slides_to_docx, slide_to_json, dump_json, boilerplate_once, JSON_FIELDS
+from slide_ir import Slide, Paragraph, Run, Table, ImageRef
+from image_store import store_blob, touch as touch_image
+from fast_parser import XmlDeck, parse_memory_estimate, inspect_deck, count_slides
+from metrics import Metrics, ParseStats, BYTES_BUCKETS
+from uploads import UploadRequest
+from janitor import Janitor
+from zip_media import build_media_index, MemberSlice, iter_inflated, CHUNK_SIZE as MEDIA_CHUNK_SIZE
+from http_cache import negotiate_encoding, compress, decompress, encoded_etag, compress_response
+from search_index import SearchIndex
 
 app = Flask(__name__)
 app.secret_key = "secret"
+app.request_class = UploadRequest
+
+# Bump whenever parse_pptx output changes so stale cache entries are ignored
+PARSER_VERSION = "9"
+# Bump whenever templates or renderers change a deck's pages or exports, which
+# are cached by clients and in the parse cache under this version
+RENDER_VERSION = "2"
+
+app.config.setdefault("UPLOAD_FOLDER", "uploads")
+# Uploads past MAX_CONTENT_LENGTH are rejected with 413; ones past
+# UPLOAD_SPOOL_THRESHOLD are spooled to UPLOAD_FOLDER while they arrive
+app.config.setdefault("MAX_CONTENT_LENGTH", 512 * 1024 * 1024)
+app.config.setdefault("UPLOAD_SPOOL_THRESHOLD", 16 * 1024 * 1024)
+app.config.setdefault("PARSE_CACHE_DIR", "cache")
+app.config.setdefault("IMAGE_STORE_DIR", os.path.join("static", "slide_images"))
+app.config.setdefault("PARSE_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+app.config.setdefault("PARSE_CACHE_MAX_ENTRIES", 500)
+# Decks with at least PARALLEL_SLIDE_THRESHOLD slides are split across PARSE_WORKERS processes
+app.config.setdefault("PARSE_WORKERS", os.cpu_count() or 1)
+app.config.setdefault("PARALLEL_SLIDE_THRESHOLD", 50)
+# "pptx" walks python-pptx shapes, "xml" reads slide XML straight from the zip
+app.config.setdefault("PARSER_BACKEND", "pptx")
+# Decks python-pptx would need more than PARSE_MEMORY_BUDGET bytes for are parsed
+# by the XML backend, which copies images over IMAGE_STREAM_THRESHOLD bytes to
+# the store in chunks; decks even that can't fit are rejected
+app.config.setdefault("PARSE_MEMORY_BUDGET", 512 * 1024 * 1024)
+app.config.setdefault("IMAGE_STREAM_THRESHOLD", 4 * 1024 * 1024)
+# At most JOB_WORKERS full parses run at once, background jobs and streamed or
+# API parses alike. Up to PARSE_QUEUE_DEPTH more wait their turn, round-robin
+# by client; a parse that would queue past that, or a request that waits
+# PARSE_QUEUE_TIMEOUT seconds without a turn, gets a 503 with Retry-After
+app.config.setdefault("JOB_WORKERS", 2)
+app.config.setdefault("PARSE_QUEUE_DEPTH", 32)
+app.config.setdefault("PARSE_QUEUE_TIMEOUT", 30)
+app.config.setdefault("JOB_TTL", 60 * 60)
+# The job page warns when a deck's pre-flight estimate exceeds SLOW_PARSE_WARNING_SECONDS
+app.config.setdefault("SLOW_PARSE_WARNING_SECONDS", 30)
+# Lazy decks are parsed SLIDE_PAGE_SIZE slides at a time as the user pages through them
+app.config.setdefault("SLIDE_PAGE_SIZE", 20)
+app.config.setdefault("MAX_SLIDE_PAGE_SIZE", 100)
+# Re-uploads of a known deck only reparse slides whose zip parts changed
+app.config.setdefault("INCREMENTAL_PARSE", True)
+# Show footers, slide numbers and layout logos once per deck rather than on every slide
+app.config.setdefault("BOILERPLATE_ONCE", False)
+# Every full parse is added to a SQLite FTS5 index served at /search
+app.config.setdefault("SEARCH_INDEX_PATH", "search_index.sqlite3")
+app.config.setdefault("SEARCH_RESULTS_LIMIT", 50)
+# A background janitor keeps UPLOAD_FOLDER and IMAGE_STORE_DIR within
+# STORAGE_MAX_BYTES and drops files unused for STORAGE_MAX_AGE seconds
+# (None disables either quota); images a cached parse uses are always kept
+app.config.setdefault("JANITOR_ENABLED", True)
+app.config.setdefault("JANITOR_DRY_RUN", False)
+app.config.setdefault("JANITOR_INTERVAL", 10 * 60)
+app.config.setdefault("STORAGE_MAX_BYTES", 10 * 1024 * 1024 * 1024)
+app.config.setdefault("STORAGE_MAX_AGE", 30 * 24 * 60 * 60)
+# Per-stage timings and counts, exposed at /metrics
+app.config.setdefault("METRICS_ENABLED", True)
+
+parse_cache = ParseCache(
+    app.config["PARSE_CACHE_DIR"],
+    PARSER_VERSION,
+    max_bytes=app.config["PARSE_CACHE_MAX_BYTES"],
+    max_entries=app.config["PARSE_CACHE_MAX_ENTRIES"],
+)
+
+metrics = Metrics(enabled=app.config["METRICS_ENABLED"])
+metrics.histogram("pptx_stage_seconds", "Time spent in each upload/parse/render stage.")
+metrics.histogram("pptx_parse_seconds", "Wall time of a full deck parse by backend.")
+metrics.counter("pptx_parsed_slides_total", "Slides parsed.")
+metrics.counter("pptx_parsed_shapes_total", "Shapes visited by the python-pptx backend.")
+metrics.counter("pptx_parsed_images_total", "Images extracted.")
+metrics.counter("pptx_reused_slides_total", "Unchanged slides copied from a previous revision's parse.")
+metrics.counter("storage_reclaimed_bytes_total", "Bytes the janitor deleted, by reason.")
+metrics.counter("parse_rejected_total", "Parses refused by admission control, by reason.")
+metrics.counter("parse_coalesced_total", "Parse requests that shared an identical in-flight parse.")
+metrics.histogram("parse_queue_wait_seconds", "Time parses waited for a turn.")
+metrics.histogram("http_request_seconds", "Request latency by endpoint.")
+metrics.histogram("http_response_bytes", "Response body size by endpoint.", BYTES_BUCKETS)
+
+search_index = SearchIndex(app.config["SEARCH_INDEX_PATH"])
+
+parse_admission = AdmissionController(
+    app.config["JOB_WORKERS"],
+    app.config["PARSE_QUEUE_DEPTH"],
+    on_wait=lambda seconds: metrics.observe("parse_queue_wait_seconds", seconds),
+)
+
+# Concurrent uploads of one deck share a single parse, keyed by deck hash
+parse_flights = SingleFlight(on_share=lambda deck_id: metrics.inc("parse_coalesced_total"))
+
+job_queue = JobQueue(
+    ttl=app.config["JOB_TTL"],
+    admission=parse_admission,
+    on_share=lambda deck_id: metrics.inc("parse_coalesced_total"),
+)
+
+os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+os.makedirs(app.config["IMAGE_STORE_DIR"], exist_ok=True)
+
+def referenced_images():
+    """Filenames of every image some cached parse still points at."""
+    names = set()
+    for value in parse_cache.values():
+        if not isinstance(value, list):
+            continue
+        for slide in value:
+            if isinstance(slide, dict):
+                names.update(ImageRef.from_dict(image).filename for image in slide.get("images", ()))
+    return names
+
+def _log_sweep(report):
+    verb = "would remove" if report.dry_run else "removed"
+    for path, size, reason in report.removed:
+        if not report.dry_run:
+            metrics.inc("storage_reclaimed_bytes_total", size, reason=reason)
+        app.logger.info("janitor %s %s (%d bytes, %s)", verb, path, size, reason)
+
+janitor = Janitor(
+    {"uploads": app.config["UPLOAD_FOLDER"], "images": app.config["IMAGE_STORE_DIR"]},
+    referenced_images,
+    max_bytes=app.config["STORAGE_MAX_BYTES"],
+    max_age=app.config["STORAGE_MAX_AGE"],
+    interval=app.config["JANITOR_INTERVAL"],
+    dry_run=app.config["JANITOR_DRY_RUN"],
+    on_report=_log_sweep,
+)
+
+# Extracted images are named by content hash, so they never change once written
+IMAGE_URL_PREFIX = "/images/"
+IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+DOCX_MIMETYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+NDJSON_MIMETYPE = "application/x-ndjson"
+# API projections within these fields are answered from the outline, without a full parse
+OUTLINE_FIELDS = {"slide_number", "title"}
+API_FIELDS_MESSAGE = f"fields must be a comma-separated subset of {', '.join(JSON_FIELDS)}."
+
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
+# Decks are identified by the SHA-256 of their bytes
+DECK_ID_RE = re.compile(r"[0-9a-f]{64}")
+
+PARSER_BACKENDS = ("pptx", "xml")
+INVALID_DECK_MESSAGE = "Uploaded file is not a valid PowerPoint or is corrupted."
+DECK_TOO_LARGE_MESSAGE = "This deck needs more memory to parse than the server allows."
+
+class InvalidDeckError(Exception):
+    """Raised when an uploaded file cannot be opened as a PowerPoint deck."""
+
+class DeckTooLargeError(InvalidDeckError):
+    """Raised when a deck cannot be parsed within PARSE_MEMORY_BUDGET by any backend."""
 
 # Bullet point styles for indentation levels
 bullet_styles = {
@@ -20,147 +205,814 @@ bullet_styles = {
     7: "\u2192",  # Level 8
 }
 
-def embed_image_as_base64(image_obj, images_list):
-    """Convert raw image blob to base64 data URI, append to images_list."""
+def store_image(image_obj, store_dir):
+    """Write image blob to the content-addressed store once and return its ImageRef."""
     blob = getattr(image_obj, "blob", None)
     if not blob:
-        return
-    base64data = base64.b64encode(blob).decode("utf-8")
-    mime_type = "image/" + image_obj.ext.lower()
-    data_uri = f"data:{mime_type};base64,{base64data}"
-    images_list.append(data_uri)
+        return None
+    return store_blob(blob, image_obj.sha1, image_obj.ext.lower(), store_dir)
+
+def extract_table(table):
+    """Read a pptx table once into rows of (text, rowspan, colspan); spanned cells are None."""
+    rows = []
+    for row in table.rows:
+        cells = []
+        for cell in row.cells:
+            if cell.is_spanned:
+                cells.append(None)
+            else:
+                cells.append((cell.text.strip(), cell.span_height, cell.span_width))
+        rows.append(cells)
+    return Table(rows)
+
+class DeckParts:
+    """What parse_slide calls on one deck share, so parts used by many slides are read once."""
 
-def parse_pptx(filepath):
+    __slots__ = ("templates", "images")
+
+    def __init__(self):
+        self.templates = {}  # layout or master part name -> (image part names, paragraph texts)
+        self.images = {}  # image part name -> ImageRef, or None if it is empty
+
+# Placeholders whose text a slide inherits from its layout, and the boilerplate kind they are marked with
+PLACEHOLDER_BOILERPLATE = {
+    PP_PLACEHOLDER.FOOTER: "footer",
+    PP_PLACEHOLDER.DATE: "date",
+    PP_PLACEHOLDER.SLIDE_NUMBER: "slide_number",
+}
+
+def picture_part_name(shape):
+    """Return the part name of a picture's embedded image, or None; python-pptx has no public accessor."""
+    r_id = shape._element.blip_rId
+    return shape.part.related_part(r_id).partname if r_id else None
+
+def _own_shapes(owner):
+    """Return (image part names, paragraph texts) of a layout or master's non-placeholder shapes."""
+    images, texts = set(), set()
+    pending = [iter(owner.shapes)]
+    while pending:
+        shape = next(pending[-1], None)
+        if shape is None:
+            pending.pop()
+        elif isinstance(shape, GroupShape):
+            pending.append(iter(shape.shapes))
+        elif shape.is_placeholder:
+            continue
+        elif isinstance(shape, Picture):
+            part_name = picture_part_name(shape)
+            if part_name:
+                images.add(part_name)
+        elif shape.has_text_frame:
+            texts.update(paragraph.text.strip() for paragraph in shape.text_frame.paragraphs)
+    texts.discard("")
+    return frozenset(images), frozenset(texts)
+
+def layout_template(parts, layout):
+    """Return (image part names, paragraph texts) of a slide layout's own shapes and its master's.
+
+    Slides copy these, e.g. a logo or a confidentiality line, so they are
+    boilerplate there. Each layout and master is read once per DeckParts.
+    """
+    key = layout.part.partname
+    template = parts.templates.get(key)
+    if template is None:
+        images, texts = _own_shapes(layout)
+        master = layout.slide_master
+        if master.part.partname not in parts.templates:
+            parts.templates[master.part.partname] = _own_shapes(master)
+        master_images, master_texts = parts.templates[master.part.partname]
+        template = parts.templates[key] = (images | master_images, texts | master_texts)
+    return template
+
+class _SlideWalk:
+    """State for one parse_slide call, filled in by the SHAPE_HANDLERS functions."""
+
+    __slots__ = ("slide", "title", "paragraphs", "pending", "image_store_dir", "parts", "template")
+
+    def __init__(self, slide_num, shapes, image_store_dir, parts, template):
+        self.slide = Slide(slide_num, None)
+        self.title = None
+        self.paragraphs = []  # (stripped text, Paragraph); the title filter runs once the title is known
+        self.pending = [iter(shapes)]  # explicit stack of shape iterators, one per open group
+        self.image_store_dir = image_store_dir
+        self.parts = parts
+        self.template = template  # layout_template of the slide's layout
+
+def _visit_title(walk, shape):
+    if walk.title is None:
+        walk.title = shape.text
+
+def run_link(run):
+    """Return a run's hyperlink target, or None; click actions like "next slide" have no target."""
     try:
-        prs = Presentation(filepath)
-    except (PackageNotFoundError, BadZipFile):
-        flash("Uploaded file is not a valid PowerPoint or is corrupted.")
-        return redirect(url_for("index"))
+        return run.hyperlink.address
+    except KeyError:
+        return None
+
+def _visit_text(walk, shape):
+    # Keep bullet levels, bold/italic runs and hyperlinks
+    placeholder_boilerplate = (
+        PLACEHOLDER_BOILERPLATE.get(shape.placeholder_format.type) if shape.is_placeholder else None
+    )
+    for paragraph in shape.text_frame.paragraphs:
+        text = paragraph.text.strip()
+        if text:
+            runs = [
+                Run(run.text, bool(run.font.bold), bool(run.font.italic), run_link(run))
+                for run in paragraph.runs
+            ]
+            # Fields such as a slide number or date have text but no runs; a paragraph of only
+            # fields would render as an empty bullet
+            if not "".join(run.text for run in runs).strip():
+                continue
+            boilerplate = placeholder_boilerplate
+            if not shape.is_placeholder and text in walk.template[1]:
+                boilerplate = "layout"
+            walk.paragraphs.append((text, Paragraph(paragraph.level, runs, boilerplate)))
+
+def _visit_table(walk, shape):
+    walk.slide.tables.append(extract_table(shape.table))
+
+def _visit_picture(walk, shape):
+    part_name = picture_part_name(shape)
+    if part_name not in walk.parts.images:
+        walk.parts.images[part_name] = store_image(shape.image, walk.image_store_dir)
+    image = walk.parts.images[part_name]
+    if image:
+        boilerplate = "layout" if part_name in walk.template[0] else None
+        walk.slide.images.append(ImageRef(image.sha1, image.ext, boilerplate))
+
+def _visit_group(walk, shape):
+    walk.pending.append(iter(shape.shapes))
+
+SHAPE_HANDLERS = {
+    "title": _visit_title,
+    "text": _visit_text,
+    "table": _visit_table,
+    "picture": _visit_picture,
+    "group": _visit_group,
+}
+
+# ParseStats field each handler's time is added to
+_HANDLER_STAGES = {"title": "title", "text": "text", "table": "table", "picture": "image"}
 
-    slides_data = []
+def shape_kind(shape):
+    """Return the SHAPE_HANDLERS key for shape, or None if it carries nothing the IR keeps."""
+    if isinstance(shape, GroupShape):
+        return "group"
+    if shape.is_placeholder and shape.placeholder_format.type == PP_PLACEHOLDER.TITLE:
+        return "title"
+    if shape.has_chart:
+        return None  # skipped on purpose, as the XML backend does: the IR has no chart node
+    if shape.has_table:
+        return "table"
+    if isinstance(shape, Picture):
+        return "picture"
+    if shape.has_text_frame:
+        return "text"
+    return None
 
+def parse_slide(slide, slide_num, image_store_dir, stats=None, parts=None):
+    """Parse a single slide into a Slide, adding per-stage timings to stats if given.
+
+    Shapes are visited once each in document order, including those nested in
+    groups at any depth. Pass the same DeckParts for every slide of a deck.
+    """
+    clock = time.perf_counter
+    parts = parts if parts is not None else DeckParts()
+    template = layout_template(parts, slide.slide_layout)
+    walk = _SlideWalk(slide_num, slide.shapes, image_store_dir, parts, template)
+    stage_times = dict.fromkeys(_HANDLER_STAGES.values(), 0.0)
+    shape_count = 0
+
+    while walk.pending:
+        shape = next(walk.pending[-1], None)
+        if shape is None:
+            walk.pending.pop()
+            continue
+        shape_count += 1
+        kind = shape_kind(shape)
+        if kind is None:
+            continue
+        started = clock()
+        SHAPE_HANDLERS[kind](walk, shape)
+        stage = _HANDLER_STAGES.get(kind)
+        if stage:
+            stage_times[stage] += clock() - started
+
+    if stats is not None:
+        for stage, seconds in stage_times.items():
+            setattr(stats, stage, getattr(stats, stage) + seconds)
+        stats.shapes += shape_count
+
+    parsed = walk.slide
+    parsed.paragraphs = [paragraph for text, paragraph in walk.paragraphs if text != walk.title]
+    parsed.title = walk.title or f"Slide {slide_num}"
+    return parsed
+
+def _parse_slide_range(filepath, start, stop, image_store_dir):
+    """Worker entry point: open the deck independently and parse slides[start:stop].
+
+    Returns (slides, ParseStats) so the parent can record the worker's stage timings.
+    """
+    stats = ParseStats()
+    parts = DeckParts()
+    slides = Presentation(filepath).slides
+    stop = min(stop, len(slides))
+    return [parse_slide(slides[i], i + 1, image_store_dir, stats, parts) for i in range(start, stop)], stats
+
+def _get_parse_executor():
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            # spawn rather than fork: the request threads may hold locks at fork time
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=app.config["PARSE_WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_executor
+
+def _drop_parse_executor(executor):
+    """Forget a pool that broke, so the next parse starts a fresh one."""
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is executor:
+            _parse_executor = None
+    executor.shutdown(wait=False)
+
+def open_presentation(filepath):
+    try:
+        return Presentation(filepath)
+    except (PackageNotFoundError, BadZipFile, KeyError, XMLSyntaxError) as exc:
+        raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+
+def iter_slides(prs, image_store_dir, stats=None):
+    """Yield parsed slides one at a time, in slide order."""
+    parts = DeckParts()
     for i, slide in enumerate(prs.slides):
-        slide_num = i + 1
-        title = None
-        images = []
-        text_html = ""
-        table_html = ""
-
-        # First pass to get the title
-        for shape in slide.shapes:
-            if shape.is_placeholder and shape.placeholder_format.type == 1:  # TITLE
-                title = shape.text
-                break
-
-        # Second pass for content
-        for shape in slide.shapes:
-            # Skip title shape in content processing
-            if shape.is_placeholder and shape.placeholder_format.type == 1:
-                continue
+        yield parse_slide(slide, i + 1, image_store_dir, stats, parts)
+
+def deck_slide_count(filepath):
+    """Return a deck's slide count without loading it; only ppt/presentation.xml is read."""
+    try:
+        return count_slides(filepath)
+    except (BadZipFile, KeyError, XMLSyntaxError, FileNotFoundError) as exc:
+        raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+
+def open_xml_deck(filepath):
+    """Open filepath with the XML backend, streaming large images to the store."""
+    try:
+        return XmlDeck(filepath, stream_threshold=app.config["IMAGE_STREAM_THRESHOLD"])
+    except (BadZipFile, KeyError, XMLSyntaxError, FileNotFoundError) as exc:
+        raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+
+def memory_estimate(filepath):
+    """Return fast_parser.parse_memory_estimate for a deck; only the zip central directory is read."""
+    try:
+        with ZipFile(filepath) as zf:
+            return parse_memory_estimate(zf.infolist(), app.config["IMAGE_STREAM_THRESHOLD"])
+    except (BadZipFile, FileNotFoundError) as exc:
+        raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+
+def fit_backend(filepath, backend, estimate=None):
+    """Return the backend to parse filepath with so it stays inside PARSE_MEMORY_BUDGET.
+
+    estimate is memory_estimate(filepath), read here if not given. Raises
+    DeckTooLargeError if neither backend fits.
+    """
+    if estimate is None:
+        estimate = memory_estimate(filepath)
+    budget = app.config["PARSE_MEMORY_BUDGET"]
+    if estimate[backend] <= budget:
+        return backend
+    if estimate["xml"] <= budget:
+        return "xml"
+    raise DeckTooLargeError(DECK_TOO_LARGE_MESSAGE)
+
+def pool_workers(estimate):
+    """How many pool workers may parse one deck at once: each loads the whole package, so
+    together they must fit in PARSE_MEMORY_BUDGET. 1 means parse in this process."""
+    per_worker = max(1, estimate["pptx"])
+    return max(1, min(app.config["PARSE_WORKERS"], app.config["PARSE_MEMORY_BUDGET"] // per_worker))
+
+def preflight(file):
+    """Return fast_parser.inspect_deck's report for a deck path or file object, without parsing it."""
+    try:
+        return inspect_deck(file, app.config["IMAGE_STREAM_THRESHOLD"])
+    except (BadZipFile, KeyError, XMLSyntaxError) as exc:
+        raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+
+def estimated_parse_seconds(report, backend):
+    """Expected wall time of parse_pptx for a preflight report, allowing for the worker pool."""
+    seconds = report["seconds"][backend]
+    if backend == "pptx" and report["slides"] >= app.config["PARALLEL_SLIDE_THRESHOLD"]:
+        seconds /= pool_workers(report["memory"])
+    return seconds
+
+def open_slides(filepath, backend, stats=None):
+    """Open filepath with the given backend; return (slide_count, iterator of parsed Slides)."""
+    image_store_dir = app.config["IMAGE_STORE_DIR"]
+    with metrics.time("pptx_stage_seconds", stage="open"):
+        if backend == "xml":
+            deck = open_xml_deck(filepath)
+            return len(deck), deck.iter_slides(image_store_dir)
+        prs = open_presentation(filepath)
+        return len(prs.slides), iter_slides(prs, image_store_dir, stats)
+
+def record_parse(slides, stats, backend, seconds):
+    """Feed one parse's counts and summed stage timings into the metrics registry."""
+    if not metrics.enabled:
+        return
+    metrics.observe("pptx_parse_seconds", seconds, backend=backend)
+    metrics.inc("pptx_parsed_slides_total", len(slides), backend=backend)
+    metrics.inc("pptx_parsed_images_total", sum(len(slide.images) for slide in slides), backend=backend)
+    if stats is not None:
+        for stage in ("title", "text", "table", "image"):
+            metrics.observe("pptx_stage_seconds", getattr(stats, stage), stage=stage)
+        metrics.inc("pptx_parsed_shapes_total", stats.shapes)
+
+def parse_pptx(filepath, progress=None, backend=None):
+    """Parse every slide in filepath, calling progress(done, total) as slides complete."""
+    started = time.perf_counter()
+    estimate = memory_estimate(filepath)
+    backend = fit_backend(filepath, backend or app.config["PARSER_BACKEND"], estimate)
+    stats = ParseStats() if metrics.enabled and backend == "pptx" else None
+    workers = pool_workers(estimate) if backend == "pptx" else 1
+    slides = None
+
+    # The XML backend is cheap enough that process start-up would dominate; a deck too big
+    # for more than one python-pptx load within the budget is parsed here too
+    slide_count = deck_slide_count(filepath) if workers > 1 else None
+    if slide_count is not None and slide_count >= app.config["PARALLEL_SLIDE_THRESHOLD"]:
+        try:
+            slides = _parse_in_pool(filepath, slide_count, workers, stats, progress)
+        except BrokenProcessPool:
+            # A worker died, say killed for memory; the deck itself may be fine, so parse it here
+            stats = ParseStats() if stats is not None else None
+    if slides is None:
+        slides = []
+        slide_count, slide_iter = open_slides(filepath, backend, stats)
+        for slide in slide_iter:
+            slides.append(slide)
+            if progress:
+                progress(len(slides), slide_count)
+
+    record_parse(slides, stats, backend, time.perf_counter() - started)
+    return slides
+
+def _parse_in_pool(filepath, slide_count, workers, stats=None, progress=None):
+    """Parse every slide of a python-pptx deck across the worker pool.
+
+    Contiguous slide ranges are farmed out; map() keeps them in slide order.
+    The workers each open the deck, so this process never loads it. Raises
+    BrokenProcessPool if a worker dies, after dropping the pool.
+    """
+    image_store_dir = app.config["IMAGE_STORE_DIR"]
+    chunk = -(-slide_count // workers)
+    starts = range(0, slide_count, chunk)
+    stops = [min(start + chunk, slide_count) for start in starts]
+    executor = _get_parse_executor()
+    slides = []
+    try:
+        for part, part_stats in executor.map(
+            _parse_slide_range,
+            [filepath] * len(starts),
+            starts,
+            stops,
+            [image_store_dir] * len(starts),
+        ):
+            slides.extend(part)
+            if stats is not None:
+                stats.merge(part_stats)
+            if progress:
+                progress(len(slides), slide_count)
+    except BrokenProcessPool:
+        _drop_parse_executor(executor)
+        raise
+    return slides
+
+def deck_path(deck_id):
+    """Uploaded decks are stored under their content hash."""
+    return os.path.join(app.config["UPLOAD_FOLDER"], deck_id + ".pptx")
+
+def discard_upload(filepath):
+    """Delete a stored upload that turned out not to be a deck we can parse."""
+    try:
+        os.remove(filepath)
+    except FileNotFoundError:
+        pass
+
+def image_url(image):
+    return IMAGE_URL_PREFIX + image.filename
+
+def load_deck(deck_id):
+    """Return the cached Slides for deck_id, or None if it hasn't been parsed."""
+    if not DECK_ID_RE.fullmatch(deck_id):
+        return None
+    cached = parse_cache.get(parse_cache.key_for(deck_id))
+    if cached is None:
+        return None
+    return [Slide.from_dict(data) for data in cached]
+
+def cache_deck(deck_id, slides):
+    parse_cache.put(parse_cache.key_for(deck_id), [slide.to_dict() for slide in slides])
+    with metrics.time("pptx_stage_seconds", stage="index"):
+        search_index.add_deck(deck_id, slides)
+
+def deck_outline(deck_id):
+    """Return the slide titles of a stored deck, indexing it on first use."""
+    key = parse_cache.key_for(deck_id + "-outline")
+    titles = parse_cache.get(key)
+    if titles is None:
+        deck = open_xml_deck(deck_path(deck_id))
+        try:
+            titles = deck.titles()
+        finally:
+            deck.close()
+        parse_cache.put(key, titles)
+    return titles
+
+def deck_media_index(deck_id):
+    """Return the media part index of a stored deck (see zip_media), building it on first use."""
+    key = parse_cache.key_for(deck_id + "-media")
+    index = parse_cache.get(key)
+    if index is None:
+        try:
+            index = build_media_index(deck_path(deck_id))
+        except BadZipFile as exc:
+            raise InvalidDeckError(INVALID_DECK_MESSAGE) from exc
+        parse_cache.put(key, index)
+    return index
+
+def deck_fingerprints(deck_id):
+    """Return per-slide part fingerprints of a stored deck, computing them on first use."""
+    key = parse_cache.key_for(deck_id + "-fingerprints")
+    fingerprints = parse_cache.get(key)
+    if fingerprints is None:
+        deck = open_xml_deck(deck_path(deck_id))
+        try:
+            fingerprints = deck.fingerprints()
+        finally:
+            deck.close()
+        parse_cache.put(key, fingerprints)
+    return fingerprints
 
-            # Handle text with proper bullet point formatting
-            if shape.has_text_frame:
-                for paragraph in shape.text_frame.paragraphs:
-                    bullet_level = paragraph.level
-                    if paragraph.text.strip() == title:  # Skip if text matches title
-                        continue
-                        
-                    runs_html = ""
-                    for run in paragraph.runs:
-                        run_text = run.text.replace("<", "&lt;").replace(">", "&gt;")
-                        if hasattr(run, "bold") and run.bold:
-                            run_text = f"<strong>{run_text}</strong>"
-                        if hasattr(run, "italic") and run.italic:
-                            run_text = f"<em>{run_text}</em>"
-                        runs_html += run_text
-
-                    if runs_html.strip():
-                        bullet_symbol = bullet_styles.get(bullet_level, "\u2022")
-                        text_html += f'<li class="level-{bullet_level}" style="margin-left:{20 * bullet_level}px; list-style-type: disc;">{runs_html}</li>'
-
-            # Handle tables with improved formatting
-            if shape.has_table:
-                table = shape.table
-                table_html += '<div class="table-container">'
-                table_html += '<table class="slide-table" style="width:100%; border-collapse:collapse; margin:10px 0;">'
-                
-                # Calculate column widths based on content
-                col_widths = []
-                for col in range(len(table.columns)):
-                    max_width = 0
-                    for row in table.rows:
-                        cell_text = row.cells[col].text.strip()
-                        max_width = max(max_width, len(cell_text))
-                    col_widths.append(max_width)
-                
-                # Add header row with special styling
-                first_row = True
-                for row in table.rows:
-                    if first_row:
-                        table_html += '<tr class="header-row">'
-                    else:
-                        table_html += '<tr>'
-                    
-                    for idx, cell in enumerate(row.cells):
-                        cell_text = cell.text.strip() if cell.text else "&nbsp;"
-                        cell_text = cell_text.replace("<", "&lt;").replace(">", "&gt;")
-                        
-                        # Calculate width percentage
-                        width_percent = (col_widths[idx] / sum(col_widths)) * 100
-                        
-                        # Add cell with specific styling
-                        if first_row:
-                            table_html += f'''
-                                <th style="
-                                    border: 1px solid #000;
-                                    padding: 8px;
-                                    background-color: #f0f0f0;
-                                    text-align: left;
-                                    width: {width_percent}%;
-                                    word-wrap: break-word;
-                                ">
-                                    {cell_text}
-                                </th>'''
-                        else:
-                            table_html += f'''
-                                <td style="
-                                    border: 1px solid #000;
-                                    padding: 8px;
-                                    text-align: left;
-                                    width: {width_percent}%;
-                                    word-wrap: break-word;
-                                ">
-                                    {cell_text}
-                                </td>'''
-                    
-                    table_html += '</tr>'
-                    first_row = False
-                
-                table_html += '</table></div>'
-
-            # Handle images
-            if hasattr(shape, "image") and shape.image:
-                embed_image_as_base64(shape.image, images)
-
-        if not title:
-            title = f"Slide {slide_num}"
-
-        slides_data.append({
-            "title": title,
-            "slide_number": slide_num,
-            "text_html": f'<ul class="slide-content">{text_html}</ul>' if text_html else "",
-            "table_html": table_html if table_html else "",
-            "images": images,
-        })
-
-    return slides_data
+def _lineage_key(filename):
+    """Cache key holding the last deck uploaded under filename."""
+    return parse_cache.key_for(hashlib.sha256(filename.encode("utf-8")).hexdigest() + "-lineage")
+
+def find_previous_revision(deck_id, filename=None):
+    """Return a stored deck that deck_id likely revises: the last one uploaded under
+    the same filename, else the indexed deck sharing most of its slide titles."""
+    previous = parse_cache.get(_lineage_key(filename)) if filename else None
+    if previous is None or previous == deck_id:
+        # Placeholder titles like "Slide 3" say nothing about lineage
+        titles = [title for i, title in enumerate(deck_outline(deck_id)) if title != f"Slide {i + 1}"]
+        previous = search_index.closest_deck(titles, exclude=deck_id)
+    if previous is None or not os.path.exists(deck_path(previous)):
+        return None
+    return previous
+
+def parse_slides_at(filepath, indices, backend, stats=None):
+    """Parse only the slides at the given 0-based indices of filepath."""
+    if not indices:
+        return []
+    image_store_dir = app.config["IMAGE_STORE_DIR"]
+    if fit_backend(filepath, backend) == "xml":
+        deck = open_xml_deck(filepath)
+        try:
+            return deck.parse_slides(indices, image_store_dir)
+        finally:
+            deck.close()
+    slides = open_presentation(filepath).slides
+    parts = DeckParts()
+    return [parse_slide(slides[i], i + 1, image_store_dir, stats, parts) for i in indices]
+
+def _renumbered(slide, slide_number):
+    """Copy a cached Slide to a new position, moving a "Slide N" fallback title with it."""
+    data = slide.to_dict()
+    if data["title"] == f"Slide {data['slide_number']}":
+        data["title"] = f"Slide {slide_number}"
+    data["slide_number"] = slide_number
+    return Slide.from_dict(data)
+
+def parse_revision(deck_id, previous, backend=None, progress=None):
+    """Parse stored deck deck_id, copying slides whose fingerprints match one in previous.
+
+    Returns None if previous is no longer in the parse cache.
+    """
+    old_slides = load_deck(previous)
+    if old_slides is None:
+        return None
+    started = time.perf_counter()
+    backend = backend or app.config["PARSER_BACKEND"]
+    reusable = dict(zip(deck_fingerprints(previous), old_slides))
+    fingerprints = deck_fingerprints(deck_id)
+    changed = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in reusable]
+
+    stats = ParseStats() if metrics.enabled and backend == "pptx" else None
+    parsed = dict(zip(changed, parse_slides_at(deck_path(deck_id), changed, backend, stats)))
+    slides = [
+        parsed[i] if i in parsed else _renumbered(reusable[fingerprint], i + 1)
+        for i, fingerprint in enumerate(fingerprints)
+    ]
+
+    record_parse(list(parsed.values()), stats, backend, time.perf_counter() - started)
+    metrics.inc("pptx_reused_slides_total", len(slides) - len(parsed))
+    if progress:
+        progress(len(slides), len(slides))
+    return slides
+
+def render_version():
+    """RENDER_VERSION plus the options that change what is rendered, for cache keys and ETags."""
+    return RENDER_VERSION + ("-b" if app.config["BOILERPLATE_ONCE"] else "")
+
+def emitted_slides(slides):
+    """Return slides as pages, exports and the API show them, with boilerplate once if BOILERPLATE_ONCE."""
+    return boilerplate_once(slides) if app.config["BOILERPLATE_ONCE"] else slides
+
+def deck_etag(deck_id, variant):
+    """Strong validator for one representation of a deck; it only changes with the versions."""
+    return f"{deck_id}-p{PARSER_VERSION}-r{render_version()}-{variant}"
+
+def _not_modified(etag):
+    """Return a 304 if the client's copy of etag, plain or in the encoding it would get now, is current."""
+    for tag in (encoded_etag(etag, negotiate_encoding(request)), etag):
+        if request.if_none_match.contains_weak(tag):
+            response = Response(status=304)
+            response.set_etag(tag)
+            response.vary.add("Accept-Encoding")
+            response.cache_control.no_cache = True
+            return response
+    return None
+
+def deck_page(deck_id, encoding):
+    """Return results.html for a parsed deck encoded with encoding (None for identity),
+    or None if the deck isn't parsed. A compressed copy is kept in the parse cache."""
+    key = parse_cache.key_for(deck_id)
+    stored_encoding = encoding or "gzip"
+    suffix = f"-r{render_version()}.html.{stored_encoding}"
+    # Pages are only served while the slides they were rendered from are cached, and keep
+    # those slides as recently used: the janitor only spares images a cached parse points at
+    body = parse_cache.get_bytes(key, suffix) if parse_cache.touch(key) else None
+    if body is None:
+        slides = load_deck(deck_id)
+        if slides is None:
+            return None
+        with metrics.time("pptx_stage_seconds", stage="render"):
+            slides_data = [slide_to_html(slide, image_url) for slide in emitted_slides(slides)]
+            page = render_template("results.html", slides_data=slides_data, deck_id=deck_id)
+        body = compress(page.encode("utf-8"), stored_encoding)
+        parse_cache.put_bytes(key, suffix, body)
+    return body if encoding else decompress(body, stored_encoding)
+
+def deck_docx(deck_id):
+    """Return the Word export of a deck as bytes, built from its parsed slides and cached by deck hash."""
+    key = parse_cache.key_for(deck_id)
+    suffix = f"-r{render_version()}.docx"
+    data = parse_cache.get_bytes(key, suffix)
+    if data is None:
+        slides = load_deck(deck_id)
+        if slides is None:
+            slides = parse_stored_deck(deck_id)
+        buffer = io.BytesIO()
+        with metrics.time("pptx_stage_seconds", stage="export"):
+            slides_to_docx(emitted_slides(slides), app.config["IMAGE_STORE_DIR"]).save(buffer)
+        data = buffer.getvalue()
+        parse_cache.put_bytes(key, suffix, data)
+    return data
+
+def parse_slide_range(deck_id, start, stop, backend=None):
+    """Return Slides [start, stop) of a stored deck, parsing only those unless the whole deck is cached."""
+    slides = load_deck(deck_id)
+    if slides is not None:
+        return slides[start:stop]
+    started = time.perf_counter()
+    filepath = deck_path(deck_id)
+    backend = fit_backend(filepath, backend or app.config["PARSER_BACKEND"])
+    image_store_dir = app.config["IMAGE_STORE_DIR"]
+    stats = None
+    if backend == "xml":
+        deck = open_xml_deck(filepath)
+        try:
+            slides = deck.parse_range(start, stop, image_store_dir)
+        finally:
+            deck.close()
+    else:
+        slides, stats = _parse_slide_range(filepath, start, stop, image_store_dir)
+    record_parse(slides, stats, backend, time.perf_counter() - started)
+    return slides
+
+def parse_deck(filepath, deck_id, backend=None, progress=None, filename=None):
+    """Parse filepath, store the result in the parse cache under deck_id and return its Slides.
+
+    If the deck revises one parsed before, only its changed slides are parsed;
+    filename is the upload's name, the first clue used to find that deck.
+    """
+    slides = None
+    if app.config["INCREMENTAL_PARSE"]:
+        previous = find_previous_revision(deck_id, filename)
+        if previous:
+            slides = parse_revision(deck_id, previous, backend, progress)
+    if slides is None:
+        slides = parse_pptx(filepath, progress=progress, backend=backend)
+    cache_deck(deck_id, slides)
+    if filename:
+        parse_cache.put(_lineage_key(filename), deck_id)
+    return slides
+
+def parse_and_cache(filepath, deck_id, backend=None, progress=None, filename=None):
+    """Job body: parse_deck, or share a parse of the same deck already running; returns deck_id.
+
+    The job queue only runs this once the job's parse turn is granted.
+    """
+    # Another upload of the deck may have finished parsing it since this job was queued
+    if parse_cache.key_for(deck_id) not in parse_cache:
+        try:
+            parse_flights.do(deck_id, parse_deck, filepath, deck_id, backend, progress, filename)
+        except InvalidDeckError:
+            discard_upload(filepath)
+            raise
+    return deck_id
+
+def parse_stored_deck(deck_id, backend=None, filename=None):
+    """parse_deck a stored deck within this request, waiting for a parse turn first.
+
+    Concurrent requests for the same deck, including a background job
+    already parsing it, wait for that one parse and share its Slides or
+    its exception. A parse in flight is joined without taking a turn, and
+    a parse is only led once the turn is held: a leader waiting for a turn
+    that one of its followers holds would never get it.
+    """
+    slides = parse_flights.join(deck_id)
+    if slides is not None:
+        return slides
+    admit_parse()
+    # The deck may have been parsed while this request waited for its turn
+    slides = load_deck(deck_id)
+    if slides is not None:
+        return slides
+    return parse_flights.do(deck_id, parse_deck, deck_path(deck_id), deck_id, backend, filename=filename)
+
+def _stream_and_cache(slide_iter, deck_id, backend, stats):
+    """Yield slides as they are parsed, caching the full deck once the last one is out."""
+    started = time.perf_counter()
+    slides = []
+    for slide in slide_iter:
+        slides.append(slide)
+        yield slide
+    record_parse(slides, stats, backend, time.perf_counter() - started)
+    cache_deck(deck_id, slides)
+
+def api_slides(deck_id, fields, backend=None, stream=False, filename=None):
+    """Return the Slides the JSON API needs for fields, or None if deck_id isn't stored.
+
+    Cached parses are used as they are. Otherwise a projection within
+    OUTLINE_FIELDS only reads titles, skipping text, table and image
+    extraction; anything else waits for a parse turn, then parses the deck
+    fully and caches it, as an iterator of slides as they are parsed if
+    stream is set.
+    """
+    slides = load_deck(deck_id)
+    if slides is not None:
+        return slides
+    filepath = deck_path(deck_id)
+    if not os.path.exists(filepath):
+        return None
+    if OUTLINE_FIELDS.issuperset(fields):
+        return [Slide(i + 1, title) for i, title in enumerate(deck_outline(deck_id))]
+    if stream:
+        return streamed_slides(filepath, deck_id, backend or app.config["PARSER_BACKEND"])
+    return parse_stored_deck(deck_id, backend, filename)
+
+def streamed_slides(source, deck_id, backend):
+    """Return a deck's Slides for a streamed response, parsed as they are consumed.
+
+    The parse leads a flight that concurrent requests for the deck share;
+    if one is already in flight, its result is waited for and returned
+    instead. source is the deck's path or file object. Call from a request:
+    the parse turn and the flight last until the response is closed. As in
+    parse_stored_deck, the turn is taken before the flight is led.
+    """
+    slides = parse_flights.join(deck_id)
+    if slides is not None:
+        return slides
+    admit_parse(streaming=True)
+    slides = load_deck(deck_id)
+    if slides is not None:
+        return slides
+    flight = parse_flights.begin(deck_id)
+    if flight is None:
+        slides = parse_flights.join(deck_id)
+        if slides is not None:
+            return slides
+    try:
+        backend = fit_backend(source, backend)
+        stats = ParseStats() if metrics.enabled and backend == "pptx" else None
+        _, slide_iter = open_slides(source, backend, stats)
+    except BaseException as exc:
+        if flight is not None:
+            flight.finish(error=exc)
+        raise
+    slides = _stream_and_cache(slide_iter, deck_id, backend, stats)
+    if flight is None:
+        return slides  # the flight we'd have joined was abandoned; parse without leading one
+
+    @after_this_request
+    def _end_flight(response):
+        response.call_on_close(flight.abandon)  # a no-op if the stream ran to the end
+        return response
+    return flight.track(slides)
+
+def _count_bytes(chunks, endpoint):
+    """Pass a streamed body through, recording its total size once it has been sent."""
+    total = 0
+    for chunk in chunks:
+        total += len(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+        yield chunk
+    metrics.observe("http_response_bytes", total, endpoint=endpoint)
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.before_request
+def _start_janitor():
+    # Started on the first request rather than at import, so parse-pool workers never run one
+    if app.config["JANITOR_ENABLED"]:
+        janitor.start()
+
+@app.after_request
+def _record_request(response):
+    if metrics.enabled and "request_started" in g:
+        endpoint = request.endpoint or "unknown"
+        metrics.observe("http_request_seconds", time.perf_counter() - g.request_started, endpoint=endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            metrics.observe("http_response_bytes", response.content_length, endpoint=endpoint)
+    return response
+
+@app.after_request
+def _compress(response):
+    # Registered after _record_request so it runs first and the metrics see the compressed size
+    if compress_response(response, negotiate_encoding(request)):
+        response = response.make_conditional(request)
+    return response
+
+@app.template_filter("pairs")
+def pair_slides(slides):
+    """Group slides into (left, right) rows; right is None for a trailing odd slide."""
+    slides = iter(slides)
+    for left in slides:
+        yield left, next(slides, None)
+
+def _client_id():
+    """Who a request counts as for fair queuing; behind a proxy, run the app under ProxyFix."""
+    return request.remote_addr or "unknown"
+
+def admit_parse(streaming=False):
+    """Wait for a parse turn and hold it for the rest of this request.
+
+    With streaming, the parse runs while the body is sent, so the turn is
+    held until the response is closed. Raises Overloaded if the queue is
+    full or no turn comes within PARSE_QUEUE_TIMEOUT.
+    """
+    ticket = parse_admission.acquire(_client_id(), app.config["PARSE_QUEUE_TIMEOUT"])
+
+    @after_this_request
+    def _release_turn(response):
+        if streaming:
+            response.call_on_close(lambda: parse_admission.release(ticket))
+        else:
+            parse_admission.release(ticket)
+        return response
+
+def _request_backend():
+    backend = request.values.get("backend")
+    return backend if backend in PARSER_BACKENDS else app.config["PARSER_BACKEND"]
+
+def _wants_json():
+    return request.accept_mimetypes.best_match(["text/html", "application/json"]) == "application/json"
 
 @app.route("/")
 def index():
     return render_template("index.html")
 
+@app.route("/images/<filename>")
+def slide_image(filename):
+    if filename.endswith(".tmp"):
+        abort(404)
+    store_dir = app.config["IMAGE_STORE_DIR"]
+    response = send_from_directory(store_dir, filename, max_age=IMAGE_MAX_AGE)
+    # send_from_directory has checked filename; serving is a use for the janitor's LRU
+    touch_image(filename, store_dir)
+    response.cache_control.immutable = True
+    return response
+
 @app.route("/upload", methods=["POST"])
 def upload_pptx():
+    # The body is received, spooled and hashed while Werkzeug parses the form
+    with metrics.time("pptx_stage_seconds", stage="receive"):
+        request.files
     if "file" not in request.files:
         flash("No file part")
         return redirect(request.url)
@@ -171,12 +1023,430 @@ def upload_pptx():
         return redirect(request.url)
 
     if file:
-        filepath = os.path.join("uploads", file.filename)
-        file.save(filepath)
+        upload = file.stream
+        deck_id = upload.hexdigest()
+        if parse_cache.key_for(deck_id) in parse_cache:
+            return redirect(url_for("show_deck", deck_id=deck_id))
+
+        # Every mode keeps the deck: a rename if it spilled to disk, one write if not
+        filepath = deck_path(deck_id)
+        with metrics.time("pptx_stage_seconds", stage="persist"):
+            upload.persist(filepath)
+
+        if request.form.get("stream"):
+            # Render rows as slides are parsed straight from the received body;
+            # it is detached because the request closes its files before the
+            # streamed response finishes
+            source = upload.detach()
+            try:
+                slides = streamed_slides(source, deck_id, _request_backend())
+            except InvalidDeckError as exc:
+                discard_upload(filepath)
+                flash(str(exc))
+                return redirect(url_for("index"))
+            slides_data = (slide_to_html(slide, image_url) for slide in emitted_slides(slides))
+            body = stream_template("results.html", slides_data=slides_data, deck_id=deck_id)
+            if metrics.enabled:
+                body = _count_bytes(body, request.endpoint)
+            return Response(
+                body,
+                mimetype="text/html",
+                headers={"X-Accel-Buffering": "no"},
+            )
+
+        if request.form.get("lazy"):
+            # Only index titles now; slide bodies are parsed as they are viewed
+            try:
+                deck_outline(deck_id)
+            except InvalidDeckError as exc:
+                discard_upload(filepath)
+                flash(str(exc))
+                return redirect(url_for("index"))
+            return redirect(url_for("show_outline", deck_id=deck_id))
+
+        # Reject what can't be parsed before it takes a worker; the rest carry a time estimate
+        try:
+            report = preflight(filepath)
+            backend = fit_backend(filepath, _request_backend())
+        except InvalidDeckError as exc:
+            discard_upload(filepath)
+            flash(str(exc))
+            return redirect(url_for("index"))
+        estimate = {
+            "slides": report["slides"],
+            "media_bytes": report["media_bytes"],
+            "seconds": round(estimated_parse_seconds(report, backend), 1),
+        }
+        job = job_queue.submit(
+            parse_and_cache, filepath, deck_id, backend,
+            key=deck_id, filename=file.filename, client=_client_id(), estimate=estimate,
+        )
+        response = redirect(url_for("job_status", job_id=job.id), code=303)
+        response.headers["X-Job-Id"] = job.id
+        return response
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(exc):
+    limit_mb = app.config["MAX_CONTENT_LENGTH"] // (1024 * 1024)
+    if _wants_json():
+        return jsonify(error=f"Upload exceeds the {limit_mb} MB limit."), 413
+    flash(f"File is too large; the limit is {limit_mb} MB.")
+    return redirect(url_for("index"))
+
+@app.errorhandler(Overloaded)
+def parse_overloaded(exc):
+    metrics.inc("parse_rejected_total", reason=exc.reason)
+    message = f"The server is busy parsing other decks; please retry in about {exc.retry_after} s."
+    headers = {"Retry-After": str(exc.retry_after)}
+    if _wants_json() or request.path.startswith("/api/"):
+        return jsonify(error=message), 503, headers
+    flash(message)
+    return render_template("index.html"), 503, headers
+
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status == "done":
+        return redirect(url_for("show_deck", deck_id=job.result))
+    if _wants_json():
+        return jsonify(job.to_dict())
+    if job.status == "failed":
+        flash(job.error)
+        return redirect(url_for("index"))
+    return render_template("job.html", job=job, warn_seconds=app.config["SLOW_PARSE_WARNING_SECONDS"])
+
+@app.route("/jobs/<job_id>/events")
+def job_events(job_id):
+    """Server-sent events stream of a job's progress, ending once it finishes."""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+
+    def stream():
+        version = None
+        while True:
+            new_version = job_queue.wait(job, version, timeout=15)
+            if new_version == version:
+                yield ": keepalive\n\n"
+                continue
+            version = new_version
+            payload = job.to_dict()
+            event = "progress"
+            if job.status == "done":
+                event = "done"
+                payload["url"] = url_for("show_deck", deck_id=job.result)
+            elif job.status == "failed":
+                event = "failed"
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+            if job.finished:
+                return
+
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route("/deck/<deck_id>")
+def show_deck(deck_id):
+    if not DECK_ID_RE.fullmatch(deck_id):
+        abort(404)
+    etag = deck_etag(deck_id, "html")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    encoding = negotiate_encoding(request)
+    body = deck_page(deck_id, encoding)
+    if body is None:
+        if os.path.exists(deck_path(deck_id)):
+            return redirect(url_for("show_outline", deck_id=deck_id))
+        abort(404)
+    response = Response(body, mimetype="text/html")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.set_etag(encoded_etag(etag, encoding))
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
+
+@app.route("/deck/<deck_id>/export.docx")
+def export_docx(deck_id):
+    if not DECK_ID_RE.fullmatch(deck_id):
+        abort(404)
+    etag = deck_etag(deck_id, "docx")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    if parse_cache.key_for(deck_id) not in parse_cache:
+        _stored_deck_or_404(deck_id)  # before deck_docx waits for a turn to parse it
+    try:
+        data = deck_docx(deck_id)
+    except InvalidDeckError:
+        abort(404)
+    return send_file(
+        io.BytesIO(data),
+        mimetype=DOCX_MIMETYPE,
+        as_attachment=True,
+        download_name=f"{deck_id[:12]}.docx",
+        etag=etag,
+        max_age=0,
+    )
+
+def _stored_deck_or_404(deck_id):
+    if not DECK_ID_RE.fullmatch(deck_id):
+        abort(404)
+    try:
+        os.utime(deck_path(deck_id))  # recently used, as far as the janitor is concerned
+    except FileNotFoundError:
+        abort(404)
+
+@app.route("/deck/<deck_id>/outline")
+def show_outline(deck_id):
+    _stored_deck_or_404(deck_id)
+    etag = deck_etag(deck_id, f"outline-{app.config['SLIDE_PAGE_SIZE']}")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    try:
+        titles = deck_outline(deck_id)
+    except InvalidDeckError:
+        abort(404)
+    response = app.make_response(render_template(
+        "outline.html", deck_id=deck_id, titles=titles, page_size=app.config["SLIDE_PAGE_SIZE"]
+    ))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+@app.route("/deck/<deck_id>/media")
+def deck_media(deck_id):
+    """JSON list of the deck's media parts: videos, audio and pictures as stored in the .pptx."""
+    _stored_deck_or_404(deck_id)
+    try:
+        index = deck_media_index(deck_id)
+    except InvalidDeckError:
+        abort(404)
+    return jsonify(media=[
+        {
+            "name": name,
+            "size": size,
+            "mimetype": mimetypes.guess_type(name)[0] or "application/octet-stream",
+            "url": url_for("deck_media_part", deck_id=deck_id, name=name),
+        }
+        for name, (_, _, size, _, _) in sorted(index.items())
+    ])
+
+@app.route("/deck/<deck_id>/media/<path:name>")
+def deck_media_part(deck_id, name):
+    """Serve a media part straight from the stored .pptx without extracting it.
+
+    Stored (uncompressed) members are read in place and honour Range
+    requests, so video can seek; deflated ones are inflated as they stream.
+    """
+    _stored_deck_or_404(deck_id)
+    try:
+        entry = deck_media_index(deck_id).get(name)
+    except InvalidDeckError:
+        abort(404)
+    if entry is None:
+        abort(404)
+    offset, compressed_size, size, method, crc = entry
+    filepath = deck_path(deck_id)
+    if method == ZIP_STORED:
+        body = wrap_file(request.environ, MemberSlice(filepath, offset, size), MEDIA_CHUNK_SIZE)
+    elif method == ZIP_DEFLATED:
+        body = iter_inflated(filepath, offset, compressed_size)
+    else:
+        abort(501)
+    response = Response(
+        body,
+        mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream",
+        direct_passthrough=True,
+    )
+    response.content_length = size
+    response.set_etag(f"{deck_id}-{crc:08x}")
+    # Decks are content-addressed, so a part's URL always means the same bytes
+    response.cache_control.public = True
+    response.cache_control.max_age = IMAGE_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request, accept_ranges=method == ZIP_STORED, complete_length=size)
+
+@app.route("/deck/<deck_id>/slides")
+def deck_slides(deck_id):
+    """HTML fragment with slides [start, start + count), parsed on demand."""
+    _stored_deck_or_404(deck_id)
+    start = request.args.get("start", 0, type=int)
+    count = request.args.get("count", app.config["SLIDE_PAGE_SIZE"], type=int)
+    if start < 0 or not 1 <= count <= app.config["MAX_SLIDE_PAGE_SIZE"]:
+        abort(400)
+    etag = deck_etag(deck_id, f"slides-{start}-{count}")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    try:
+        slides = parse_slide_range(deck_id, start, start + count, _request_backend())
+    except (InvalidDeckError, BadZipFile, KeyError, PackageNotFoundError):
+        abort(404)
+    with metrics.time("pptx_stage_seconds", stage="render"):
+        slides_data = [slide_to_html(slide, image_url) for slide in emitted_slides(slides)]
+        response = app.make_response(render_template("slides.html", slides_data=slides_data))
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
+
+def deck_available(deck_id):
+    """Whether /deck/<deck_id> can be shown: its parse is cached or the upload is still stored."""
+    return parse_cache.key_for(deck_id) in parse_cache or os.path.exists(deck_path(deck_id))
+
+def search_decks(query):
+    """search_index hits for query on decks that can still be shown.
+
+    Nothing tells the index when the parse cache or the janitor drops a
+    deck, so decks found gone here are removed from it.
+    """
+    limit = app.config["SEARCH_RESULTS_LIMIT"]
+    while True:
+        hits = search_index.search(query, limit)
+        gone = {deck_id for deck_id in {hit["deck_id"] for hit in hits} if not deck_available(deck_id)}
+        if not gone:
+            return hits
+        search_index.remove_decks(gone)
+
+@app.route("/search")
+def search():
+    query = request.args.get("q", "").strip()
+    hits = search_decks(query) if query else []
+    if _wants_json():
+        return jsonify(query=query, hits=hits)
+    return render_template("search.html", query=query, hits=hits)
+
+def _api_error(message, status):
+    return jsonify(error=message), status
+
+def _api_fields():
+    """Return the requested ?fields= projection in JSON_FIELDS order, or None if it names unknown fields."""
+    raw = request.args.get("fields")
+    if not raw:
+        return JSON_FIELDS
+    requested = {field.strip() for field in raw.split(",") if field.strip()}
+    if not requested or not requested.issubset(JSON_FIELDS):
+        return None
+    return tuple(field for field in JSON_FIELDS if field in requested)
+
+def _wants_ndjson():
+    return request.args.get("format") == "ndjson" or request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def _api_response(deck_id, slides, fields, ndjson, status=200):
+    """Serialise slides as one JSON document, or as one NDJSON line per slide streamed as it's ready."""
+    slides = emitted_slides(slides)
+    if ndjson:
+        body = (dump_json(slide_to_json(slide, image_url, fields)) + b"\n" for slide in slides)
+        if metrics.enabled:
+            body = _count_bytes(body, request.endpoint)
+        return Response(body, status=status, mimetype=NDJSON_MIMETYPE, headers={"X-Accel-Buffering": "no"})
+    with metrics.time("pptx_stage_seconds", stage="render"):
+        data = [slide_to_json(slide, image_url, fields) for slide in slides]
+        body = dump_json({"id": deck_id, "slide_count": len(data), "slides": data})
+    return Response(body, status=status, mimetype="application/json")
+
+def _inspection(report, deck_id):
+    return {"id": deck_id, "parsed": parse_cache.key_for(deck_id) in parse_cache, **report}
+
+@app.route("/api/inspect", methods=["POST"])
+def api_inspect():
+    """Pre-flight report for a deck sent as the "file" form part; nothing is stored or parsed."""
+    file = request.files.get("file")
+    if file is None or file.filename == "":
+        return _api_error("No file part.", 400)
+    try:
+        report = preflight(file.stream)
+    except InvalidDeckError as exc:
+        return _api_error(str(exc), 400)
+    return jsonify(_inspection(report, file.stream.hexdigest()))
+
+@app.route("/api/decks/<deck_id>/inspect")
+def api_inspect_deck(deck_id):
+    """Pre-flight report for a stored deck."""
+    if not DECK_ID_RE.fullmatch(deck_id) or not os.path.exists(deck_path(deck_id)):
+        return _api_error("Unknown deck.", 404)
+    try:
+        report = preflight(deck_path(deck_id))
+    except InvalidDeckError as exc:
+        return _api_error(str(exc), 400)
+    return jsonify(_inspection(report, deck_id))
+
+@app.route("/api/decks", methods=["POST"])
+def api_create_deck():
+    """Upload a deck as the "file" form part and get its parsed slides back."""
+    fields = _api_fields()
+    if fields is None:
+        return _api_error(API_FIELDS_MESSAGE, 400)
+    with metrics.time("pptx_stage_seconds", stage="receive"):
+        file = request.files.get("file")
+    if file is None or file.filename == "":
+        return _api_error("No file part.", 400)
+
+    upload = file.stream
+    deck_id = upload.hexdigest()
+    filepath = deck_path(deck_id)
+    existed = os.path.exists(filepath)
+    with metrics.time("pptx_stage_seconds", stage="persist"):
+        upload.persist(filepath)
+    ndjson = _wants_ndjson()
+    try:
+        slides = api_slides(deck_id, fields, _request_backend(), stream=ndjson, filename=file.filename)
+    except DeckTooLargeError as exc:
+        discard_upload(filepath)
+        return _api_error(str(exc), 413)
+    except InvalidDeckError as exc:
+        discard_upload(filepath)
+        return _api_error(str(exc), 400)
+    response = _api_response(deck_id, slides, fields, ndjson, status=200 if existed else 201)
+    response.headers["Location"] = url_for("api_deck", deck_id=deck_id)
+    return response
+
+@app.route("/api/decks/<deck_id>")
+def api_deck(deck_id):
+    """Parsed slides of a stored deck as JSON or NDJSON, projected to ?fields=."""
+    if not DECK_ID_RE.fullmatch(deck_id):
+        return _api_error("Unknown deck.", 404)
+    fields = _api_fields()
+    if fields is None:
+        return _api_error(API_FIELDS_MESSAGE, 400)
+    ndjson = _wants_ndjson()
+    etag = deck_etag(deck_id, f"{'ndjson' if ndjson else 'json'}-{'.'.join(fields)}")
+    not_modified = _not_modified(etag)
+    if not_modified:
+        return not_modified
+    try:
+        slides = api_slides(deck_id, fields, _request_backend(), stream=ndjson)
+    except DeckTooLargeError as exc:
+        return _api_error(str(exc), 413)
+    except InvalidDeckError as exc:
+        return _api_error(str(exc), 400)
+    if slides is None:
+        return _api_error("Unknown deck.", 404)
+    response = _api_response(deck_id, slides, fields, ndjson)
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response
 
-        slides_data = parse_pptx(filepath)
+@app.route("/metrics")
+def metrics_endpoint():
+    if not metrics.enabled:
+        abort(404)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
-        return render_template("results.html", slides_data=slides_data)
+@app.cli.command("janitor")
+@click.option("--dry-run", is_flag=True, help="Only report what would be deleted.")
+def janitor_command(dry_run):
+    """Run one storage sweep now and print what it removed."""
+    report = janitor.sweep(dry_run=dry_run or None)
+    for path, size, reason in report.removed:
+        click.echo(f"{'would remove' if report.dry_run else 'removed'} {path} ({size} bytes, {reason})")
+    click.echo(f"{report.freed_bytes} of {report.total_bytes} bytes freed")
 
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5001)
\ No newline at end of file
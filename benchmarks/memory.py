@@ -0,0 +1,102 @@
+"""Check that the XML backend's peak RSS stays flat as a deck's image count grows.
+
+    python -m benchmarks.memory --images 8 32 128 --image-size 512
+
+Each deck is parsed in a fresh single-worker interpreter; the figure reported
+is its peak RSS over the RSS right after import. Needs Linux's /proc.
+python-pptx is measured alongside for comparison. Exits non-zero if the
+largest deck's XML-backend growth exceeds the smallest's by more than
+--tolerance.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import generate_deck
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Peak RSS growth allowed between the smallest and largest deck, in KiB
+TOLERANCE_KB = 8 * 1024
+
+
+def _rss_kb(field):
+    """Read VmRSS (now) or VmHWM (peak) from /proc, in KiB.
+
+    ru_maxrss would be simpler, but Linux carries it across exec, so a child
+    would inherit the parent's peak from the moment it forked.
+    """
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} not in /proc/self/status")
+
+
+def _child(deck, backend, stream_threshold):
+    sys.path.insert(0, REPO_ROOT)
+    import app as app_module
+
+    app_module.app.config["IMAGE_STREAM_THRESHOLD"] = stream_threshold
+    app_module.app.config["PARSE_WORKERS"] = 1  # keep the parse in this process
+    baseline = _rss_kb("VmRSS")
+    slides = app_module.parse_pptx(deck, backend=backend)
+    print(json.dumps({
+        "rss_growth_kb": _rss_kb("VmHWM") - baseline,
+        "images": sum(len(slide.images) for slide in slides),
+    }))
+
+
+def _measure(deck, backend, stream_threshold, workdir):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memory", "--child", deck, backend, str(stream_threshold)],
+        cwd=workdir,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    if argv is None and sys.argv[1:2] == ["--child"]:
+        _, deck, backend, stream_threshold = sys.argv[1:]
+        return _child(deck, backend, int(stream_threshold))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, nargs="+", default=[8, 32, 128], help="image counts to try")
+    parser.add_argument("--image-size", type=int, default=512, help="image edge in pixels")
+    parser.add_argument("--stream-threshold", type=int, default=0, help="IMAGE_STREAM_THRESHOLD for the run")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE_KB, help="allowed growth in KiB")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="pptx-mem-")
+    try:
+        rows = []
+        for count in args.images:
+            deck = os.path.join(workdir, f"images-{count}.pptx")
+            generate_deck(deck, slides=count, bullets=2, images=1, image_size=args.image_size)
+            row = {"images": count, "deck_kb": os.path.getsize(deck) // 1024}
+            for backend in ("xml", "pptx"):
+                row[backend] = _measure(deck, backend, args.stream_threshold, workdir)["rss_growth_kb"]
+            rows.append(row)
+            print(f"{count:5} images  {row['deck_kb']:8} KiB deck  "
+                  f"xml +{row['xml']:7} KiB  pptx +{row['pptx']:7} KiB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    growth = rows[-1]["xml"] - rows[0]["xml"]
+    if growth > args.tolerance:
+        print(f"FAIL: XML backend peak RSS grew {growth} KiB from {rows[0]['images']} "
+              f"to {rows[-1]['images']} images")
+        return 1
+    print(f"ok: XML backend peak RSS grew {growth} KiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
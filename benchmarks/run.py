@@ -0,0 +1,184 @@
+"""Time parse, render and end-to-end upload on synthetic decks.
+
+    python -m benchmarks.run --slides 200 --images 2 --output bench_output.json
+
+The app is imported from inside a scratch directory, so its uploads/, cache/
+and image store are isolated from the working tree and every iteration
+starts from a cold parse cache. Results are written as sorted, indented JSON
+so two runs can be diffed directly.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import MAX_LEVELS, generate_deck
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    idx = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _measure(fn, iterations, slide_count, before=None):
+    """Run fn `iterations` times for latency, then once more under tracemalloc for peak memory."""
+    samples = []
+    for _ in range(iterations):
+        if before:
+            before()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    if before:
+        before()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "slides_per_sec": round(slide_count / statistics.median(samples), 1),
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def run(args):
+    deck_path = os.path.abspath(os.path.join(args.workdir, "synthetic.pptx"))
+    generate_deck(
+        deck_path,
+        slides=args.slides,
+        bullets=args.bullets,
+        levels=args.levels,
+        table_rows=args.table_rows,
+        table_cols=args.table_cols,
+        images=args.images,
+        image_size=args.image_size,
+        seed=args.seed,
+    )
+    with open(deck_path, "rb") as fh:
+        deck_bytes = fh.read()
+
+    import app as app_module
+    from renderers import slide_to_html
+
+    app = app_module.app
+    app.config["PARALLEL_SLIDE_THRESHOLD"] = args.parallel_threshold
+
+    def clear_cache():
+        for name in os.listdir(app_module.parse_cache.directory):
+            os.remove(os.path.join(app_module.parse_cache.directory, name))
+
+    results = {}
+    parsed = {}
+    for backend in app_module.PARSER_BACKENDS:
+        results[f"parse[{backend}]"] = _measure(
+            lambda: parsed.__setitem__(backend, app_module.parse_pptx(deck_path, backend=backend)),
+            args.iterations,
+            args.slides,
+        )
+
+    slides = parsed["pptx"]
+
+    def render():
+        with app.test_request_context():
+            slides_data = [slide_to_html(slide, app_module.image_url) for slide in slides]
+            return app_module.render_template("results.html", slides_data=slides_data)
+
+    results["render"] = _measure(render, args.iterations, args.slides)
+    html_bytes = len(render().encode("utf-8"))
+
+    client = app.test_client()
+
+    def upload():
+        response = client.post("/upload", data={"file": (io.BytesIO(deck_bytes), "synthetic.pptx")})
+        job_url = response.headers["Location"]
+        while True:
+            response = client.get(job_url, headers={"Accept": "application/json"})
+            if response.status_code == 302:
+                break
+            if response.json["status"] == "failed":
+                raise RuntimeError(response.json["error"])
+            time.sleep(0.005)
+        page = client.get(response.headers["Location"])
+        assert page.status_code == 200
+
+    results["upload"] = _measure(upload, args.iterations, args.slides, before=clear_cache)
+
+    return {
+        "config": {
+            "slides": args.slides,
+            "bullets": args.bullets,
+            "levels": args.levels,
+            "table": [args.table_rows, args.table_cols],
+            "images": args.images,
+            "image_size": args.image_size,
+            "seed": args.seed,
+            "parallel_threshold": args.parallel_threshold,
+            "deck_bytes": len(deck_bytes),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+        "html_bytes": html_bytes,
+        "backends_match": [s.to_dict() for s in parsed["pptx"]] == [s.to_dict() for s in parsed["xml"]],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slides", type=int, default=50)
+    parser.add_argument("--bullets", type=int, default=6, help="bullets per slide")
+    parser.add_argument("--levels", type=int, default=MAX_LEVELS, help="bullet nesting levels (1-8)")
+    parser.add_argument("--table-rows", type=int, default=0)
+    parser.add_argument("--table-cols", type=int, default=0)
+    parser.add_argument("--images", type=int, default=0, help="images per slide")
+    parser.add_argument("--image-size", type=int, default=256, help="image edge in pixels")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument(
+        "--parallel-threshold", type=int, default=10 ** 9,
+        help="PARALLEL_SLIDE_THRESHOLD for the run (default: never use the process pool)",
+    )
+    parser.add_argument("--output", default="bench_output.json")
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    args.workdir = tempfile.mkdtemp(prefix="pptx-bench-")
+    sys.path.insert(0, REPO_ROOT)
+    cwd = os.getcwd()
+    os.chdir(args.workdir)
+    try:
+        report = run(args)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(args.workdir, ignore_errors=True)
+
+    with open(output, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    for name, stats in sorted(report["results"].items()):
+        print(f"{name:14} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  "
+              f"{stats['slides_per_sec']:9.1f} slides/s  peak {stats['peak_mem_kb']:9.1f} KiB")
+    print(f"wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import io
+import random
+
+from PIL import Image
+from pptx import Presentation
+from pptx.util import Inches, Pt
+
+# Matches the eight levels in app.bullet_styles
+MAX_LEVELS = 8
+
+
+def _noise_png(size, rng):
+    """A size x size PNG of random pixels, so every image is distinct and incompressible."""
+    image = Image.frombytes("RGB", (size, size), rng.randbytes(size * size * 3))
+    buf = io.BytesIO()
+    image.save(buf, format="PNG")
+    buf.seek(0)
+    return buf
+
+
+def generate_deck(
+    path,
+    slides=50,
+    bullets=6,
+    levels=MAX_LEVELS,
+    table_rows=0,
+    table_cols=0,
+    images=0,
+    image_size=256,
+    seed=0,
+):
+    """Write a synthetic .pptx to path and return path.
+
+    Each slide gets a title, `bullets` paragraphs cycling through nesting
+    levels 0..levels-1 (with some bold and italic runs), an optional
+    table_rows x table_cols table and `images` random PNGs of image_size px.
+    """
+    rng = random.Random(seed)
+    levels = max(1, min(levels, MAX_LEVELS))
+    prs = Presentation()
+    layout = prs.slide_layouts[1]  # Title and Content
+
+    for slide_idx in range(slides):
+        slide = prs.slides.add_slide(layout)
+        slide.shapes.title.text = f"Synthetic slide {slide_idx + 1}"
+
+        text_frame = slide.placeholders[1].text_frame
+        for bullet_idx in range(bullets):
+            paragraph = text_frame.paragraphs[0] if bullet_idx == 0 else text_frame.add_paragraph()
+            paragraph.level = bullet_idx % levels
+            for run_idx in range(3):
+                run = paragraph.add_run()
+                run.text = f"Bullet {bullet_idx} run {run_idx} <{rng.randrange(10 ** 6)}> "
+                run.font.bold = run_idx == 1
+                run.font.italic = run_idx == 2
+
+        if table_rows and table_cols:
+            table = slide.shapes.add_table(
+                table_rows, table_cols, Inches(0.5), Inches(4.5), Inches(9), Inches(2)
+            ).table
+            for row in range(table_rows):
+                for col in range(table_cols):
+                    cell = table.cell(row, col)
+                    cell.text = f"r{row}c{col} " + "x" * rng.randrange(1, 20)
+                    cell.text_frame.paragraphs[0].runs[0].font.size = Pt(8)
+
+        for image_idx in range(images):
+            slide.shapes.add_picture(
+                _noise_png(image_size, rng), Inches(0.5 + image_idx), Inches(6), width=Inches(1)
+            )
+
+    prs.save(path)
+    return path
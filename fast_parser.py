@@ -0,0 +1,430 @@
+import hashlib
+import posixpath
+import re
+import zipfile
+
+from lxml import etree
+
+from image_store import store_blob, store_stream
+from slide_ir import Slide, Paragraph, Run, Table, ImageRef
+
+_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+
+
+def _qn(tag):
+    prefix, name = tag.split(":")
+    return f"{{{_NS[prefix]}}}{name}"
+
+
+_SP_TREE = _qn("p:spTree")
+_GRP_SP = _qn("p:grpSp")
+_SHAPE_PARENTS = (_SP_TREE, _GRP_SP)
+_SHAPE_TAGS = [_qn(tag) for tag in ("p:sp", "p:grpSp", "p:graphicFrame", "p:cxnSp", "p:pic", "p:contentPart")]
+_SP = _qn("p:sp")
+_PIC = _qn("p:pic")
+_GRAPHIC_FRAME = _qn("p:graphicFrame")
+_R = _qn("a:r")
+_BR = _qn("a:br")
+_FLD = _qn("a:fld")
+_T = _qn("a:t")
+_R_PR = _qn("a:rPr")
+_HLINK_CLICK = _qn("a:hlinkClick")
+_R_EMBED = _qn("r:embed")
+_R_ID = _qn("r:id")
+
+_TRUE = ("1", "true")
+
+# Placeholders whose text a slide inherits from its layout, and the boilerplate kind they are marked with
+_PLACEHOLDER_BOILERPLATE = {"ftr": "footer", "dt": "date", "sldNum": "slide_number"}
+# (media part names, paragraph texts) of a slide with no layout to compare against
+_NO_TEMPLATE = (frozenset(), frozenset())
+
+# Same mapping python-pptx uses for Image.ext, keyed by part extension rather than PIL format.
+# PIL reads EMF as its WMF format, so python-pptx calls EMF parts wmf too
+_IMAGE_EXTS = {
+    "bmp": "bmp",
+    "emf": "wmf",
+    "gif": "gif",
+    "jpg": "jpg",
+    "jpeg": "jpg",
+    "png": "png",
+    "tif": "tiff",
+    "tiff": "tiff",
+    "wmf": "wmf",
+}
+
+# Same options python-pptx parses parts with, so whitespace-only text is treated identically
+_PARSER_OPTIONS = {"remove_blank_text": True, "resolve_entities": False}
+
+
+# Rough size of a parsed lxml tree relative to the XML it was parsed from
+XML_TREE_FACTOR = 4
+
+
+def parse_memory_estimate(infos, stream_threshold):
+    """Estimate each backend's peak parse memory in bytes from a deck's zip member infos.
+
+    python-pptx loads every part up front and parses all XML parts; the XML
+    backend holds one slide's tree and at most one image below stream_threshold.
+    """
+    xml_sizes, slide_sizes, binary_sizes = [], [], []
+    for info in infos:
+        if info.filename.endswith((".xml", ".rels")):
+            xml_sizes.append(info.file_size)
+            if info.filename.startswith("ppt/slides/slide") or info.filename == "ppt/presentation.xml":
+                slide_sizes.append(info.file_size)
+        else:
+            binary_sizes.append(info.file_size)
+    largest_read = max(
+        (size for size in binary_sizes if stream_threshold is None or size <= stream_threshold), default=0
+    )
+    return {
+        "pptx": XML_TREE_FACTOR * sum(xml_sizes) + sum(binary_sizes),
+        "xml": XML_TREE_FACTOR * max(slide_sizes, default=0) + largest_read,
+    }
+
+
+# Rough single-worker parse time per byte of slide XML, and per byte of image copied
+# to the store, measured on benchmarks.synthetic decks
+PARSE_SECONDS_PER_XML_BYTE = {"pptx": 0.27e-6, "xml": 0.09e-6}
+IMAGE_SECONDS_PER_BYTE = 1e-9
+
+_CHART_PART = re.compile(r"ppt/charts/chart\d+\.xml")
+
+
+def count_slides(file):
+    """Return how many slides a deck has, reading only ppt/presentation.xml.
+
+    Raises zipfile.BadZipFile, KeyError or lxml.etree.XMLSyntaxError if file
+    is not a usable deck.
+    """
+    with zipfile.ZipFile(file) as zf:
+        presentation = etree.fromstring(zf.read("ppt/presentation.xml"))
+    return len(presentation.findall("p:sldIdLst/p:sldId", _NS))
+
+
+def inspect_deck(file, stream_threshold=None):
+    """Describe a deck and estimate its parse cost without parsing it.
+
+    Reads only the zip central directory and ppt/presentation.xml, so it
+    takes milliseconds however large the media is. file is a path or a
+    seekable binary file; stream_threshold is as for parse_memory_estimate.
+    Tables live inside slide XML rather than in parts
+    of their own, so they aren't counted. Raises zipfile.BadZipFile,
+    KeyError or lxml.etree.XMLSyntaxError if file is not a usable deck.
+    """
+    with zipfile.ZipFile(file) as zf:
+        infos = zf.infolist()
+        presentation = etree.fromstring(zf.read("ppt/presentation.xml"))
+    slides = len(presentation.findall("p:sldIdLst/p:sldId", _NS))
+    slide_xml_bytes = sum(
+        info.file_size for info in infos
+        if info.filename.startswith("ppt/slides/slide") and info.filename.endswith(".xml")
+    )
+    media = [info for info in infos if info.filename.startswith("ppt/media/")]
+    media_bytes = sum(info.file_size for info in media)
+    return {
+        "slides": slides,
+        "parts": len(infos),
+        "bytes": sum(info.file_size for info in infos),
+        "compressed_bytes": sum(info.compress_size for info in infos),
+        "slide_xml_bytes": slide_xml_bytes,
+        "media": len(media),
+        "media_bytes": media_bytes,
+        "charts": sum(1 for info in infos if _CHART_PART.fullmatch(info.filename)),
+        "embedded_objects": sum(1 for info in infos if info.filename.startswith("ppt/embeddings/")),
+        "memory": parse_memory_estimate(infos, stream_threshold),
+        "seconds": {
+            backend: round(per_byte * slide_xml_bytes + IMAGE_SECONDS_PER_BYTE * media_bytes, 3)
+            for backend, per_byte in PARSE_SECONDS_PER_XML_BYTE.items()
+        },
+    }
+
+
+def _read_rels(zf, part_name):
+    """Return ({rId: target part name} for part_name's internal relationships,
+    {rId: target as written} for all of them, which is what hyperlinks report)."""
+    directory, filename = posixpath.split(part_name)
+    rels_name = posixpath.join(directory, "_rels", filename + ".rels")
+    try:
+        root = etree.fromstring(zf.read(rels_name))
+    except KeyError:
+        return {}, {}
+    rels, targets = {}, {}
+    for rel in root.iter(_qn("rel:Relationship")):
+        targets[rel.get("Id")] = rel.get("Target")
+        if rel.get("TargetMode") == "External":
+            continue
+        rels[rel.get("Id")] = posixpath.normpath(posixpath.join(directory, rel.get("Target")))
+    return rels, targets
+
+
+def _paragraph_text(p):
+    parts = []
+    for child in p:
+        if child.tag == _BR:
+            parts.append("\v")
+        elif child.tag in (_R, _FLD):
+            t = child.find(_T)
+            parts.append((t.text or "") if t is not None else "")
+    return "".join(parts)
+
+
+def _text_body_text(tx_body):
+    return "\n".join(_paragraph_text(p) for p in tx_body.iterfind("a:p", _NS))
+
+
+def _placeholder_type(shape):
+    ph = shape.find("./*/p:nvPr/p:ph", _NS)
+    if ph is None:
+        return None
+    return ph.get("type", "obj")
+
+
+def _is_movie(pic):
+    """Non-placeholder pictures carrying a video are Movie shapes, which have no image."""
+    return _placeholder_type(pic) is None and pic.find("p:nvPicPr/p:nvPr/a:videoFile", _NS) is not None
+
+
+def _related_part(rels, folder):
+    """Return the first of rels' targets in ppt/<folder>/, e.g. a slide's layout, or None."""
+    return next((target for target in rels.values() if posixpath.dirname(target) == f"ppt/{folder}"), None)
+
+
+def _extract_table(tbl):
+    rows = []
+    for tr in tbl.iterfind("a:tr", _NS):
+        cells = []
+        for tc in tr.iterfind("a:tc", _NS):
+            if tc.get("hMerge") in _TRUE or tc.get("vMerge") in _TRUE:
+                cells.append(None)
+                continue
+            tx_body = tc.find("a:txBody", _NS)
+            text = _text_body_text(tx_body) if tx_body is not None else ""
+            cells.append((text.strip(), int(tc.get("rowSpan", 1)), int(tc.get("gridSpan", 1))))
+        rows.append(cells)
+    return Table(rows)
+
+
+class XmlDeck:
+    """A .pptx read straight from its zip parts, without building python-pptx shape proxies.
+
+    Produces the same Slide IR as app.parse_slide for the features it understands:
+    title placeholders, paragraphs with levels and bold/italic/hyperlinked runs,
+    tables and embedded pictures, including those nested in groups.
+    Images larger than stream_threshold bytes are copied to the store in chunks
+    rather than read whole, so memory stays bounded by one slide's XML.
+    Each layout and master is read once per deck, and each image part
+    stored once, however many slides share them.
+    Raises zipfile.BadZipFile, KeyError or lxml.etree.XMLSyntaxError if
+    filepath is not a usable deck.
+    """
+
+    def __init__(self, filepath, stream_threshold=None):
+        self.stream_threshold = stream_threshold
+        self._templates = {}  # layout or master part -> (media part names, paragraph texts)
+        self._images = {}  # media part -> ImageRef, or None if it is empty
+        self._zf = zipfile.ZipFile(filepath)
+        try:
+            presentation = etree.fromstring(self._zf.read("ppt/presentation.xml"))
+            rels, _ = _read_rels(self._zf, "ppt/presentation.xml")
+            self.slide_parts = [
+                rels[sld_id.get(_R_ID)] for sld_id in presentation.iterfind("p:sldIdLst/p:sldId", _NS)
+            ]
+        except BaseException:
+            self._zf.close()
+            raise
+
+    def __len__(self):
+        return len(self.slide_parts)
+
+    def close(self):
+        self._zf.close()
+
+    def iter_slides(self, image_store_dir):
+        """Yield a Slide per slide part in presentation order, closing the zip when done."""
+        try:
+            for i, part_name in enumerate(self.slide_parts):
+                yield self._parse_slide(part_name, i + 1, image_store_dir)
+        finally:
+            self.close()
+
+    def parse_range(self, start, stop, image_store_dir):
+        """Parse only slides[start:stop]; the zip stays open for further calls."""
+        return self.parse_slides(range(start, min(stop, len(self.slide_parts))), image_store_dir)
+
+    def parse_slides(self, indices, image_store_dir):
+        """Parse the slides at the given 0-based indices, in that order."""
+        return [self._parse_slide(self.slide_parts[i], i + 1, image_store_dir) for i in indices]
+
+    def fingerprints(self):
+        """Return a digest per slide of the CRC32 and size of its part and of every part it relates to.
+
+        CRCs and sizes come from the zip central directory, so only the small
+        .rels parts are read. Part names are left out, as PowerPoint renumbers
+        slides and media on save; a slide that was only moved keeps its digest.
+        External targets such as hyperlink URLs are digested as written.
+        """
+        infos = {info.filename: info for info in self._zf.infolist()}
+        fingerprints = []
+        for part_name in self.slide_parts:
+            info = infos[part_name]
+            digest = hashlib.sha1(f"{info.CRC}:{info.file_size}".encode())
+            rels, targets = _read_rels(self._zf, part_name)
+            for r_id, target in sorted(targets.items()):
+                if r_id not in rels:
+                    digest.update(f";{r_id}:{target}".encode())
+                    continue
+                target_info = infos.get(rels[r_id])
+                if target_info is None:
+                    digest.update(f";{r_id}:-".encode())
+                else:
+                    digest.update(f";{r_id}:{target_info.CRC}:{target_info.file_size}".encode())
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+
+    def titles(self):
+        """Return every slide's title as the full parse reports it, reading only up to each title shape."""
+        titles = []
+        for i, part_name in enumerate(self.slide_parts):
+            title = None
+            with self._zf.open(part_name) as stream:
+                for _, shape in etree.iterparse(stream, events=("end",), tag=_SHAPE_TAGS, **_PARSER_OPTIONS):
+                    if shape.getparent().tag in _SHAPE_PARENTS and _placeholder_type(shape) == "title":
+                        tx_body = shape.find("p:txBody", _NS) if shape.tag == _SP else None
+                        title = _text_body_text(tx_body) if tx_body is not None else ""
+                        break
+            titles.append(title or f"Slide {i + 1}")
+        return titles
+
+    def _store_image(self, part_name, ext, image_store_dir):
+        if part_name in self._images:
+            return self._images[part_name]
+        size = self._zf.getinfo(part_name).file_size
+        if not size:
+            image = None
+        elif self.stream_threshold is not None and size > self.stream_threshold:
+            with self._zf.open(part_name) as stream:
+                image = store_stream(stream, ext, image_store_dir)
+        else:
+            blob = self._zf.read(part_name)
+            image = store_blob(blob, hashlib.sha1(blob).hexdigest(), ext, image_store_dir)
+        self._images[part_name] = image
+        return image
+
+    def _own_shapes(self, part_name):
+        """Return (media part names, paragraph texts) of a layout or master's non-placeholder
+        shapes, read the same way as app._own_shapes."""
+        rels, _ = _read_rels(self._zf, part_name)
+        images, texts = set(), set()
+        root = etree.fromstring(self._zf.read(part_name), etree.XMLParser(**_PARSER_OPTIONS))
+        for shape in root.iterfind("p:cSld/p:spTree//*", _NS):
+            if shape.tag not in (_SP, _PIC) or shape.getparent().tag not in _SHAPE_PARENTS:
+                continue
+            if _placeholder_type(shape) is not None:
+                continue
+            if shape.tag == _PIC:
+                blip = shape.find("p:blipFill/a:blip", _NS)
+                target = rels.get(blip.get(_R_EMBED)) if blip is not None else None
+                if target and not _is_movie(shape):
+                    images.add(target)
+                continue
+            tx_body = shape.find("p:txBody", _NS)
+            if tx_body is not None:
+                texts.update(_paragraph_text(p).strip() for p in tx_body.iterfind("a:p", _NS))
+        texts.discard("")
+        return frozenset(images), frozenset(texts)
+
+    def _layout_template(self, layout_part):
+        """Return (media part names, paragraph texts) of a layout's own shapes and its master's."""
+        template = self._templates.get(layout_part)
+        if template is None:
+            images, texts = self._own_shapes(layout_part)
+            master_part = _related_part(_read_rels(self._zf, layout_part)[0], "slideMasters")
+            if master_part:
+                if master_part not in self._templates:
+                    self._templates[master_part] = self._own_shapes(master_part)
+                master_images, master_texts = self._templates[master_part]
+                images, texts = images | master_images, texts | master_texts
+            template = self._templates[layout_part] = (images, texts)
+        return template
+
+    def _parse_slide(self, part_name, slide_num, image_store_dir):
+        rels, targets = _read_rels(self._zf, part_name)
+        layout_part = _related_part(rels, "slideLayouts")
+        layout_images, layout_texts = self._layout_template(layout_part) if layout_part else _NO_TEMPLATE
+        title = None
+        parsed = Slide(slide_num, None)
+        paragraphs = []  # (text, Paragraph); the title filter runs once the title is known
+
+        with self._zf.open(part_name) as stream:
+            for _, shape in etree.iterparse(stream, events=("end",), tag=_SHAPE_TAGS, **_PARSER_OPTIONS):
+                # A group's end event comes after its children's, so they are
+                # visited in the same depth-first order as app.parse_slide
+                if shape.getparent().tag not in _SHAPE_PARENTS:
+                    continue  # e.g. inside mc:AlternateContent, which python-pptx doesn't see either
+                if shape.tag == _GRP_SP:
+                    shape.clear()
+                    continue
+
+                ph_type = _placeholder_type(shape)
+                tx_body = shape.find("p:txBody", _NS) if shape.tag == _SP else None
+
+                if ph_type == "title":
+                    if title is None:
+                        title = _text_body_text(tx_body) if tx_body is not None else ""
+                elif tx_body is not None:
+                    placeholder_boilerplate = _PLACEHOLDER_BOILERPLATE.get(ph_type)
+                    for p in tx_body.iterfind("a:p", _NS):
+                        text = _paragraph_text(p)
+                        if not text.strip():
+                            continue
+                        boilerplate = placeholder_boilerplate
+                        if ph_type is None and text.strip() in layout_texts:
+                            boilerplate = "layout"
+                        p_pr = p.find("a:pPr", _NS)
+                        level = int(p_pr.get("lvl", 0)) if p_pr is not None else 0
+                        runs = []
+                        for r in p.iterfind("a:r", _NS):
+                            t = r.find(_T)
+                            r_pr = r.find(_R_PR)
+                            hlink = r_pr.find(_HLINK_CLICK) if r_pr is not None else None
+                            runs.append(Run(
+                                (t.text or "") if t is not None else "",
+                                r_pr is not None and r_pr.get("b") in _TRUE,
+                                r_pr is not None and r_pr.get("i") in _TRUE,
+                                targets.get(hlink.get(_R_ID)) if hlink is not None else None,
+                            ))
+                        # Same rule as app._visit_text: a paragraph of only fields has no runs to show
+                        if not "".join(run.text for run in runs).strip():
+                            continue
+                        paragraphs.append((text, Paragraph(level, runs, boilerplate)))
+
+                if ph_type != "title" and shape.tag == _GRAPHIC_FRAME:
+                    tbl = shape.find("a:graphic/a:graphicData/a:tbl", _NS)
+                    if tbl is not None:
+                        parsed.tables.append(_extract_table(tbl))
+
+                if ph_type != "title" and shape.tag == _PIC and not _is_movie(shape):
+                    blip = shape.find("p:blipFill/a:blip", _NS)
+                    target = rels.get(blip.get(_R_EMBED)) if blip is not None else None
+                    ext = _IMAGE_EXTS.get(posixpath.splitext(target)[1][1:].lower()) if target else None
+                    if ext:
+                        image = self._store_image(target, ext, image_store_dir)
+                        if image:
+                            boilerplate = "layout" if target in layout_images else None
+                            parsed.images.append(ImageRef(image.sha1, image.ext, boilerplate))
+
+                # Shape handled; drop it and anything before it to keep memory flat
+                shape.clear()
+                while shape.getprevious() is not None:
+                    del shape.getparent()[0]
+
+        parsed.paragraphs = [paragraph for text, paragraph in paragraphs if text.strip() != title]
+        parsed.title = title or f"Slide {slide_num}"
+        return parsed
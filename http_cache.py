@@ -0,0 +1,57 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip is offered
+    brotli = None
+
+# Server preference order when the client accepts several equally
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_MIMETYPES = {"text/html", "text/plain", "text/css", "application/json", "application/javascript"}
+# Below this the header overhead and CPU outweigh the saving
+MIN_COMPRESS_BYTES = 1024
+
+
+def negotiate_encoding(request):
+    """Return the best of ENCODINGS the client accepts, or None for an identity body."""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def compress(data, encoding, fast=False):
+    """Compress bytes with encoding; fast trades ratio for speed on per-request bodies."""
+    if encoding == "br":
+        return brotli.compress(data, quality=5 if fast else 11)
+    return gzip.compress(data, compresslevel=6 if fast else 9, mtime=0)
+
+
+def decompress(data, encoding):
+    if encoding == "br":
+        return brotli.decompress(data)
+    return gzip.decompress(data)
+
+
+def encoded_etag(etag, encoding):
+    """Strong ETags must differ per encoding, so the encoded body gets a suffixed tag."""
+    return f"{etag}-{encoding}" if encoding else etag
+
+
+def compress_response(response, encoding):
+    """Compress a buffered response body in place if it is worth it; return whether it was."""
+    if response.is_streamed or response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return False
+    response.vary.add("Accept-Encoding")
+    if (
+        encoding is None
+        or "Content-Encoding" in response.headers
+        or response.status_code != 200
+    ):
+        return False
+    data = response.get_data()
+    if len(data) < MIN_COMPRESS_BYTES:
+        return False
+    response.set_data(compress(data, encoding, fast=True))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+    return True
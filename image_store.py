@@ -0,0 +1,60 @@
+import hashlib
+import os
+import tempfile
+
+from slide_ir import ImageRef
+
+
+def _touch(path):
+    """Mark an existing store file as just used, for the janitor's LRU; False if it is missing."""
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+
+def touch(filename, store_dir):
+    """Mark the stored file filename as just used; False if it is missing.
+
+    Only call once filename is known to be a plain name inside store_dir.
+    """
+    return _touch(os.path.join(store_dir, filename))
+
+
+def store_blob(blob, sha1, ext, store_dir):
+    """Write blob to the content-addressed store as <sha1>.<ext> unless present; return its ImageRef."""
+    image = ImageRef(sha1, ext)
+    path = os.path.join(store_dir, image.filename)
+    if not _touch(path):
+        fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(blob)
+        os.replace(tmp_path, path)
+    return image
+
+
+def store_stream(stream, ext, store_dir, chunk_size=1024 * 1024):
+    """Copy stream into the store chunk by chunk, hashing as it goes; return its ImageRef.
+
+    Only chunk_size bytes are held in memory at a time, however large the image.
+    """
+    sha1 = hashlib.sha1()
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                sha1.update(chunk)
+                fh.write(chunk)
+        image = ImageRef(sha1.hexdigest(), ext)
+        path = os.path.join(store_dir, image.filename)
+        if _touch(path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return image
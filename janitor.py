@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+
+
+class SweepReport:
+    """What one sweep deleted, or would have deleted in dry-run mode."""
+
+    def __init__(self, dry_run):
+        self.dry_run = dry_run
+        self.total_bytes = 0
+        self.removed = []  # (path, size, reason)
+
+    @property
+    def freed_bytes(self):
+        return sum(size for _, size, _ in self.removed)
+
+
+class Janitor:
+    """Reclaims space in the upload and image directories on a background thread.
+
+    Files are aged by mtime, which the app bumps whenever a deck or image is
+    used, so eviction is least-recently-used first. A sweep removes anything
+    unused for max_age seconds, then the oldest files until the directories
+    fit in max_bytes. Images named by referenced_images() (those a cached
+    parse still points at) and anything touched in the last grace seconds are
+    never removed. With dry_run, sweeps only report. Background sweeps pass
+    their SweepReport to on_report.
+    """
+
+    def __init__(self, directories, referenced_images, max_bytes=None, max_age=None,
+                 grace=10 * 60, interval=10 * 60, dry_run=False, on_report=None):
+        self.directories = directories  # {"uploads": path, "images": path}
+        self.referenced_images = referenced_images
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.grace = grace
+        self.interval = interval
+        self.dry_run = dry_run
+        self.on_report = on_report
+        self._lock = threading.Lock()  # held for a whole sweep
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the sweep thread once; later calls are no-ops and never wait for a sweep."""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="storage-janitor", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            report = self.sweep()
+            if self.on_report:
+                self.on_report(report)
+
+    def _candidates(self, now):
+        """Return every file as (mtime, size, path, evictable), oldest first."""
+        files = []
+        for kind, directory in self.directories.items():
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            referenced = self.referenced_images() if kind == "images" else ()
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+                evictable = now - st.st_mtime > self.grace and entry.name not in referenced
+                files.append((st.st_mtime, st.st_size, entry.path, evictable))
+        files.sort()
+        return files
+
+    def sweep(self, dry_run=None):
+        """Apply the age and size quotas once and return a SweepReport."""
+        dry_run = self.dry_run if dry_run is None else dry_run
+        report = SweepReport(dry_run)
+        with self._lock:
+            now = time.time()
+            files = self._candidates(now)
+            total = report.total_bytes = sum(size for _, size, _, _ in files)
+            for mtime, size, path, evictable in files:
+                if not evictable:
+                    continue
+                if self.max_age is not None and now - mtime > self.max_age:
+                    reason = "age"
+                elif self.max_bytes is not None and total > self.max_bytes:
+                    reason = "size"
+                else:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        continue
+                report.removed.append((path, size, reason))
+                total -= size
+        return report
@@ -0,0 +1,130 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Job:
+    """State of one queued parse, shared between the worker thread and the HTTP handlers."""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"  # queued -> running -> done | failed
+        self.done = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.version = 0  # bumped on every change so watchers can wait for updates
+        self.finished_at = None
+        self.estimate = None  # the submitter's pre-flight cost estimate, if it made one
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+            "estimate": self.estimate,
+        }
+
+
+class JobQueue:
+    """Runs parse jobs on a local thread pool and tracks their progress.
+
+    The submitted function receives a progress(done, total) callback as its
+    progress keyword argument. Its return value becomes job.result; an
+    exception marks the job failed with str(exc) as job.error. An estimate
+    passed to submit is kept on the job and reported with its progress.
+    Finished jobs are forgotten ttl seconds after completion.
+
+    A job submitted with a key while another job with that key is still
+    unfinished is not run; submit returns the unfinished job instead, so
+    its progress, result or error is shared, and calls on_share with the key.
+
+    With an admission.AdmissionController, jobs take their turn from it
+    instead of running max_workers at a time in submission order: submit
+    raises Overloaded when its queue is full, and a job stays "queued" until
+    its client's turn comes.
+    """
+
+    def __init__(self, max_workers=2, ttl=60 * 60, admission=None, on_share=None):
+        if admission is not None:
+            # A thread per job that may be running or waiting, so the controller alone decides the order
+            max_workers = admission.max_active + admission.max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="parse-job")
+        self._jobs = {}
+        self._unfinished = {}  # key -> Job, for jobs submitted with a key
+        self._changed = threading.Condition()
+        self.admission = admission
+        self.on_share = on_share
+        self.ttl = ttl
+
+    def submit(self, fn, *args, key=None, client=None, estimate=None, **kwargs):
+        with self._changed:
+            job = self._unfinished.get(key) if key is not None else None
+            if job is None:
+                # Enqueued under the lock so two submits with one key can't both start a job
+                ticket = self.admission.enqueue(client) if self.admission is not None else None
+                job = Job()
+                job.estimate = estimate
+                self._prune()
+                self._jobs[job.id] = job
+                if key is not None:
+                    self._unfinished[key] = job
+                self._executor.submit(self._run, job, key, ticket, fn, args, kwargs)
+                return job
+        if self.on_share:
+            self.on_share(key)
+        return job
+
+    def get(self, job_id):
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def wait(self, job, version, timeout):
+        """Block until job.version differs from version or timeout expires."""
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def _update(self, job, **changes):
+        with self._changed:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._changed.notify_all()
+
+    def _run(self, job, key, ticket, fn, args, kwargs):
+        if ticket is not None:
+            self.admission.wait(ticket)
+        self._update(job, status="running")
+
+        def progress(done, total):
+            self._update(job, done=done, total=total)
+
+        try:
+            result = fn(*args, progress=progress, **kwargs)
+        except Exception as exc:
+            self._finish(job, key, status="failed", error=str(exc) or exc.__class__.__name__)
+        else:
+            self._finish(job, key, status="done", result=result)
+        finally:
+            if ticket is not None:
+                self.admission.release(ticket)
+
+    def _finish(self, job, key, **changes):
+        with self._changed:
+            if key is not None:
+                del self._unfinished[key]
+            self._update(job, finished_at=time.monotonic(), **changes)
+
+    def _prune(self):
+        cutoff = time.monotonic() - self.ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self._jobs[job_id]
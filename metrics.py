@@ -0,0 +1,113 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+
+class ParseStats:
+    """Per-stage time and counts for a batch of parsed slides.
+
+    Cheap to fill in unconditionally; it only reaches the registry when
+    metrics are enabled. Picklable, so process-pool workers can return it.
+    """
+
+    __slots__ = ("title", "text", "table", "image", "shapes")
+
+    def __init__(self):
+        self.title = self.text = self.table = self.image = 0.0
+        self.shapes = 0
+
+    def merge(self, other):
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class _Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(pairs, extra=None):
+    items = list(pairs) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+class Metrics:
+    """In-process counters and histograms rendered in the Prometheus text format.
+
+    Every recording method returns immediately when enabled is False, so the
+    instrumentation left in hot paths costs one attribute check.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._meta = {}  # name -> (type, help, buckets)
+        self._series = {}  # name -> {label tuple: value or _Histogram}
+
+    def counter(self, name, help_text):
+        self._meta[name] = ("counter", help_text, None)
+        self._series.setdefault(name, {})
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._meta[name] = ("histogram", help_text, tuple(buckets))
+        self._series.setdefault(name, {})
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self._meta[name][2])
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, **labels):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = []
+        with self._lock:
+            for name, (kind, help_text, buckets) in self._meta.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key, value in sorted(self._series[name].items()):
+                    if kind == "counter":
+                        lines.append(f"{name}{_labels(key)} {value}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + ("+Inf",), value.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(key, ('le', bound))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {value.sum}")
+                    lines.append(f"{name}_count{_labels(key)} {cumulative}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import threading
+
+
+class ParseCache:
+    """On-disk cache of parsed decks, keyed by content hash + parser version.
+
+    Entries are plain JSON files, plus opaque blobs such as rendered exports
+    stored under the same keys with their own suffix. Every hit bumps the
+    file's mtime, so eviction can drop the least recently used entries once
+    the cache grows past max_bytes or max_entries.
+    """
+
+    def __init__(self, directory, parser_version, max_bytes=256 * 1024 * 1024, max_entries=500):
+        self.directory = directory
+        self.parser_version = parser_version
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key_for(self, digest):
+        return f"{digest}-v{self.parser_version}"
+
+    def _path(self, key, suffix=".json"):
+        return os.path.join(self.directory, key + suffix)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                slides_data = json.load(fh)
+        except (FileNotFoundError, ValueError):
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:
+            pass
+        return slides_data
+
+    def touch(self, key):
+        """Mark key's JSON entry as recently used without reading it; return False if it is missing."""
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def values(self):
+        """Yield every cached JSON value without marking it as used; unreadable entries are skipped."""
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, name), "r", encoding="utf-8") as fh:
+                    yield json.load(fh)
+            except (FileNotFoundError, ValueError):
+                continue
+
+    def put(self, key, slides_data):
+        """Atomically write JSON-serialisable slides_data under key, then enforce the size bounds."""
+        self._write(
+            self._path(key), lambda fh: json.dump(slides_data, fh, separators=(",", ":")), "w", "utf-8"
+        )
+
+    def get_bytes(self, key, suffix):
+        """Return the blob cached under key with suffix (e.g. ".docx"), or None on a miss."""
+        path = self._path(key, suffix)
+        try:
+            with open(path, "rb") as fh:
+                data = fh.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put_bytes(self, key, suffix, data):
+        """Atomically write a blob under key with suffix, then enforce the size bounds."""
+        self._write(self._path(key, suffix), lambda fh: fh.write(data))
+
+    def _write(self, path, write, mode="wb", encoding=None):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode, encoding=encoding) as fh:
+                write(fh)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the cache is within bounds."""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if name.endswith(".tmp"):
+                    continue  # a write in progress
+                path = os.path.join(self.directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+
+            entries.sort()
+            total = sum(size for _, size, _ in entries)
+            while entries and (total > self.max_bytes or len(entries) > self.max_entries):
+                _, size, path = entries.pop(0)
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
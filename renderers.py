@@ -0,0 +1,231 @@
+import html
+import json
+import os
+import re
+
+from docx import Document
+from docx.image.exceptions import UnrecognizedImageError
+from docx.shared import Inches
+
+from slide_ir import Slide
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder gives the same bytes, only slower
+    orjson = None
+
+# Word's built-in bullet styles only go three levels deep
+DOCX_LIST_STYLES = ["List Bullet", "List Bullet 2", "List Bullet 3"]
+DOCX_MAX_IMAGE_WIDTH = Inches(6)
+
+# Fields of the JSON API's slide objects, in output order
+JSON_FIELDS = ("slide_number", "title", "paragraphs", "tables", "images", "links")
+
+# Control characters are not allowed in Word XML; PowerPoint uses \x0b for soft line breaks
+_XML_ILLEGAL_CHARS = re.compile(r"[\x00-\x08\x0c\x0e-\x1f]")
+
+
+def paragraphs_to_html(paragraphs):
+    items = []
+    for paragraph in paragraphs:
+        parts = []
+        for run in paragraph.runs:
+            text = html.escape(run.text, quote=False)
+            if run.bold:
+                text = f"<strong>{text}</strong>"
+            if run.italic:
+                text = f"<em>{text}</em>"
+            parts.append(text)
+        level = paragraph.level
+        items.append(
+            f'<li class="level-{level}" style="margin-left:{20 * level}px; list-style-type: disc;">'
+            f'{"".join(parts)}</li>'
+        )
+    if not items:
+        return ""
+    return f'<ul class="slide-content">{"".join(items)}</ul>'
+
+
+def column_widths(table):
+    """Return each column's share of the table width in percent, sized by its longest cell.
+
+    A merged cell's length is spread evenly over the columns it spans.
+    """
+    widths = [0] * table.column_count
+    for cells in table.rows:
+        for col_idx, cell in enumerate(cells):
+            if cell is None:
+                continue
+            text, _, colspan = cell
+            for col in range(col_idx, min(col_idx + colspan, len(widths))):
+                widths[col] = max(widths[col], len(text) / colspan)
+    total = sum(widths)
+    if not total:
+        return [100 / len(widths)] * len(widths)
+    return [100 * width / total for width in widths]
+
+
+def table_to_html(table):
+    """Render a table; the first row is the header, styling lives in results.html."""
+    parts = ['<div class="table-container"><table class="slide-table"><colgroup>']
+    parts.extend(f'<col style="width:{width:.1f}%">' for width in column_widths(table))
+    parts.append("</colgroup>")
+    for row_idx, cells in enumerate(table.rows):
+        tag = "th" if row_idx == 0 else "td"
+        parts.append('<tr class="header-row">' if row_idx == 0 else "<tr>")
+        for cell in cells:
+            if cell is None:
+                continue
+            text, rowspan, colspan = cell
+            attrs = ""
+            if rowspan > 1:
+                attrs += f' rowspan="{rowspan}"'
+            if colspan > 1:
+                attrs += f' colspan="{colspan}"'
+            parts.append(f"<{tag}{attrs}>{html.escape(text, quote=False) or '&nbsp;'}</{tag}>")
+        parts.append("</tr>")
+    parts.append("</table></div>")
+    return "".join(parts)
+
+
+def slide_to_html(slide, image_url):
+    """Return the dict results.html renders for one slide; image_url maps an ImageRef to its URL."""
+    return {
+        "title": slide.title,
+        "slide_number": slide.slide_number,
+        "text_html": paragraphs_to_html(slide.paragraphs),
+        "table_html": "".join(table_to_html(table) for table in slide.tables if table.rows),
+        "images": [image_url(image) for image in slide.images],
+    }
+
+
+def boilerplate_once(slides):
+    """Yield copies of slides with each boilerplate paragraph and image kept only where it first appears.
+
+    Slide number placeholders are dropped altogether, as every slide
+    already carries its number. Takes and yields slides one at a time, so it
+    also works on slides streamed as they are parsed.
+    """
+    seen_text, seen_images = set(), set()
+    for slide in slides:
+        paragraphs = []
+        for paragraph in slide.paragraphs:
+            if paragraph.boilerplate:
+                if paragraph.boilerplate == "slide_number" or paragraph.text in seen_text:
+                    continue
+                seen_text.add(paragraph.text)
+            paragraphs.append(paragraph)
+        images = []
+        for image in slide.images:
+            if image.boilerplate:
+                if image.filename in seen_images:
+                    continue
+                seen_images.add(image.filename)
+            images.append(image)
+        yield Slide(slide.slide_number, slide.title, paragraphs, slide.tables, images)
+
+
+def _paragraph_to_json(paragraph):
+    runs = []
+    for run in paragraph.runs:
+        out = {"text": run.text, "bold": run.bold, "italic": run.italic}
+        if run.link:
+            out["link"] = run.link
+        runs.append(out)
+    out = {"level": paragraph.level, "text": paragraph.text, "runs": runs}
+    if paragraph.boilerplate:
+        out["boilerplate"] = paragraph.boilerplate
+    return out
+
+
+def _table_to_json(table):
+    """Rows of cell text (None where a merge covers the cell), plus [row, column, rowspan, colspan] per merge."""
+    spans = [
+        [row_idx, col_idx, cell[1], cell[2]]
+        for row_idx, cells in enumerate(table.rows)
+        for col_idx, cell in enumerate(cells)
+        if cell is not None and (cell[1] > 1 or cell[2] > 1)
+    ]
+    return {"rows": [[cell[0] if cell else None for cell in cells] for cells in table.rows], "spans": spans}
+
+
+def slide_to_json(slide, image_url, fields=JSON_FIELDS):
+    """Return the JSON API object for one slide with only the given JSON_FIELDS."""
+    out = {}
+    for field in fields:
+        if field == "slide_number":
+            out[field] = slide.slide_number
+        elif field == "title":
+            out[field] = slide.title
+        elif field == "paragraphs":
+            out[field] = [_paragraph_to_json(paragraph) for paragraph in slide.paragraphs]
+        elif field == "tables":
+            out[field] = [_table_to_json(table) for table in slide.tables]
+        elif field == "images":
+            out[field] = [{**image.to_dict(), "url": image_url(image)} for image in slide.images]
+        elif field == "links":
+            out[field] = [
+                {"text": run.text, "url": run.link}
+                for paragraph in slide.paragraphs
+                for run in paragraph.runs
+                if run.link
+            ]
+    return out
+
+
+def dump_json(value):
+    """Serialise value to compact UTF-8 JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _docx_text(text):
+    return _XML_ILLEGAL_CHARS.sub("", text.replace("\x0b", "\n"))
+
+
+def _add_docx_table(doc, table):
+    if not table.rows:
+        return
+    out = doc.add_table(rows=len(table.rows), cols=table.column_count)
+    out.style = "Table Grid"
+    for row_idx, cells in enumerate(table.rows):
+        for col_idx, cell in enumerate(cells):
+            if cell is None:
+                continue
+            text, rowspan, colspan = cell
+            target = out.cell(row_idx, col_idx)
+            if rowspan > 1 or colspan > 1:
+                target = target.merge(out.cell(row_idx + rowspan - 1, col_idx + colspan - 1))
+            target.text = _docx_text(text)
+            if row_idx == 0:
+                for run in target.paragraphs[0].runs:
+                    run.bold = True
+
+
+def slides_to_docx(slides, image_dir):
+    """Build a Word document from parsed slides, embedding pictures from image_dir."""
+    doc = Document()
+    for slide in slides:
+        doc.add_heading(_docx_text(slide.title), level=1)
+
+        for paragraph in slide.paragraphs:
+            style = DOCX_LIST_STYLES[min(paragraph.level, len(DOCX_LIST_STYLES) - 1)]
+            out = doc.add_paragraph(style=style)
+            for run in paragraph.runs:
+                out_run = out.add_run(_docx_text(run.text))
+                out_run.bold = run.bold or None
+                out_run.italic = run.italic or None
+
+        for table in slide.tables:
+            _add_docx_table(doc, table)
+
+        for image in slide.images:
+            try:
+                picture = doc.add_picture(os.path.join(image_dir, image.filename))
+            except (UnrecognizedImageError, FileNotFoundError):
+                continue  # e.g. WMF/EMF, which Word documents can't take via python-docx
+            if picture.width > DOCX_MAX_IMAGE_WIDTH:
+                picture.height = int(picture.height * DOCX_MAX_IMAGE_WIDTH / picture.width)
+                picture.width = DOCX_MAX_IMAGE_WIDTH
+    return doc
@@ -0,0 +1,121 @@
+import html
+import sqlite3
+import threading
+
+# Private-use sentinels mark snippet matches so the text can be escaped before <mark> goes in
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS slide_text (
+    id INTEGER PRIMARY KEY,
+    deck_id TEXT NOT NULL,
+    slide_number INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    tables TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS slide_text_deck ON slide_text (deck_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS slide_fts USING fts5(
+    title, body, tables,
+    content='slide_text', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS slide_text_ai AFTER INSERT ON slide_text BEGIN
+    INSERT INTO slide_fts (rowid, title, body, tables) VALUES (new.id, new.title, new.body, new.tables);
+END;
+CREATE TRIGGER IF NOT EXISTS slide_text_ad AFTER DELETE ON slide_text BEGIN
+    INSERT INTO slide_fts (slide_fts, rowid, title, body, tables)
+    VALUES ('delete', old.id, old.title, old.body, old.tables);
+END;
+"""
+
+
+def slide_text(slide):
+    """Return (body, tables) plain text for one Slide, as it is indexed."""
+    body = "\n".join("".join(run.text for run in paragraph.runs) for paragraph in slide.paragraphs)
+    tables = "\n".join(
+        " | ".join(cell[0] for cell in row if cell is not None)
+        for table in slide.tables
+        for row in table.rows
+    )
+    return body, tables
+
+
+def match_query(text):
+    """Turn free text into an FTS5 query that ANDs each word as a literal phrase."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _snippet_html(snippet):
+    return (
+        html.escape(snippet, quote=False)
+        .replace(_MATCH_START, "<mark>")
+        .replace(_MATCH_END, "</mark>")
+    )
+
+
+class SearchIndex:
+    """SQLite FTS5 index over parsed slides: title, body text and table text.
+
+    Rows live in slide_text, keyed by deck; slide_fts is an external-content
+    index kept in step by triggers. Indexing a deck replaces only that deck's
+    rows, so adding one costs only its own slides.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # Losing the last commits to a power cut only drops search hits; skip the per-commit fsync
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    def add_deck(self, deck_id, slides):
+        rows = [(deck_id, slide.slide_number, slide.title, *slide_text(slide)) for slide in slides]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM slide_text WHERE deck_id = ?", (deck_id,))
+            self._conn.executemany(
+                "INSERT INTO slide_text (deck_id, slide_number, title, body, tables) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def remove_decks(self, deck_ids):
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM slide_text WHERE deck_id = ?", [(deck_id,) for deck_id in deck_ids])
+
+    def closest_deck(self, titles, exclude=None, min_share=0.5):
+        """Return the indexed deck sharing the most of titles, if it has at least min_share of them."""
+        wanted = set(titles)
+        if not wanted:
+            return None
+        placeholders = ",".join("?" * len(wanted))
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT deck_id, COUNT(DISTINCT title) AS shared FROM slide_text"
+                f" WHERE title IN ({placeholders}) AND deck_id != ?"
+                " GROUP BY deck_id ORDER BY shared DESC LIMIT 1",
+                (*wanted, exclude or ""),
+            ).fetchone()
+        if row is None or row[1] < min_share * len(wanted):
+            return None
+        return row[0]
+
+    def search(self, text, limit=50):
+        """Return up to limit hits for text, best first, as dicts with an HTML-safe snippet."""
+        query = match_query(text)
+        if not query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.deck_id, t.slide_number, t.title,"
+                " snippet(slide_fts, -1, ?, ?, '…', 16)"
+                " FROM slide_fts JOIN slide_text AS t ON t.id = slide_fts.rowid"
+                " WHERE slide_fts MATCH ? ORDER BY rank LIMIT ?",
+                (_MATCH_START, _MATCH_END, query, limit),
+            ).fetchall()
+        return [
+            {"deck_id": deck_id, "slide_number": number, "title": title, "snippet_html": _snippet_html(snippet)}
+            for deck_id, number, title, snippet in rows
+        ]
@@ -0,0 +1,116 @@
+import threading
+
+
+class _Abandoned(Exception):
+    """A leader gave up before finishing; whoever was waiting has to do the work itself."""
+
+
+class Flight:
+    """One in-flight call; finish publishes its outcome to every caller waiting on it."""
+
+    __slots__ = ("_flights", "_key", "_done", "_value", "_error")
+
+    def __init__(self, flights, key):
+        self._flights = flights
+        self._key = key
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+
+    def finish(self, value=None, error=None):
+        """Publish value, or error to be raised again in each waiter; only the first call counts."""
+        with self._flights._lock:
+            if self._done.is_set():
+                return
+            if self._flights._calls.get(self._key) is self:
+                del self._flights._calls[self._key]
+            self._value = value
+            self._error = error
+            self._done.set()
+
+    def abandon(self):
+        """Stop leading without an outcome; a no-op once finished."""
+        self.finish(error=_Abandoned())
+
+    def track(self, iterable):
+        """Yield iterable's items as they come, then finish with the list of them."""
+        items = []
+        try:
+            for item in iterable:
+                items.append(item)
+                yield item
+        except GeneratorExit:
+            self.abandon()
+            raise
+        except BaseException as exc:
+            self.finish(error=exc)
+            raise
+        self.finish(items)
+
+    def result(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and get the same return value, or the same exception raised
+    again. Nothing is remembered once the call finishes, so later calls run
+    afresh. Work that isn't one function call, like a parse streamed to a
+    client, can lead a flight by hand with begin. on_share, if given, is
+    called with the key for every caller that shared another's result.
+    """
+
+    def __init__(self, on_share=None):
+        self.on_share = on_share
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def begin(self, key):
+        """Return a Flight the caller must finish or abandon, or None if key is already in flight."""
+        with self._lock:
+            if key in self._calls:
+                return None
+            flight = self._calls[key] = Flight(self, key)
+            return flight
+
+    def do(self, key, fn, *args, **kwargs):
+        while True:
+            with self._lock:
+                flight = self._calls.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._calls[key] = Flight(self, key)
+            if leader:
+                break
+            try:
+                return self._share(key, flight)
+            except _Abandoned:
+                continue
+        try:
+            value = fn(*args, **kwargs)
+        except BaseException as exc:
+            flight.finish(error=exc)
+            raise
+        flight.finish(value)
+        return value
+
+    def join(self, key, default=None):
+        """Wait for an in-flight call for key and return its result, or default if none is running."""
+        with self._lock:
+            flight = self._calls.get(key)
+        if flight is None:
+            return default
+        try:
+            return self._share(key, flight)
+        except _Abandoned:
+            return default
+
+    def _share(self, key, flight):
+        if self.on_share:
+            self.on_share(key)
+        return flight.result()
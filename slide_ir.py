@@ -0,0 +1,125 @@
+class Run:
+    """A span of text; link is its hyperlink target (a URL, or a slide part for jumps) or None."""
+
+    __slots__ = ("text", "bold", "italic", "link")
+
+    def __init__(self, text, bold=False, italic=False, link=None):
+        self.text = text
+        self.bold = bold
+        self.italic = italic
+        self.link = link
+
+    def to_dict(self):
+        data = {"text": self.text, "bold": self.bold, "italic": self.italic}
+        if self.link:
+            data["link"] = self.link  # most runs have none; keep cache entries small
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["text"], data["bold"], data["italic"], data.get("link"))
+
+
+# Kinds of boilerplate a Paragraph or ImageRef can be marked with: the contents of a
+# footer, date or slide number placeholder, or a copy of a layout or master's own shape
+BOILERPLATE_KINDS = ("footer", "date", "slide_number", "layout")
+
+
+class Paragraph:
+    """A bulleted paragraph; boilerplate is one of BOILERPLATE_KINDS, or None for slide content."""
+
+    __slots__ = ("level", "runs", "boilerplate")
+
+    def __init__(self, level, runs, boilerplate=None):
+        self.level = level
+        self.runs = runs
+        self.boilerplate = boilerplate
+
+    @property
+    def text(self):
+        return "".join(run.text for run in self.runs)
+
+    def to_dict(self):
+        data = {"level": self.level, "runs": [run.to_dict() for run in self.runs]}
+        if self.boilerplate:
+            data["boilerplate"] = self.boilerplate
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["level"], [Run.from_dict(run) for run in data["runs"]], data.get("boilerplate"))
+
+
+class Table:
+    """Rows of (text, rowspan, colspan) cells; cells covered by a merge are None."""
+
+    __slots__ = ("rows",)
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @property
+    def column_count(self):
+        return len(self.rows[0]) if self.rows else 0
+
+    def to_dict(self):
+        return {"rows": [[list(cell) if cell else None for cell in cells] for cells in self.rows]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([[tuple(cell) if cell else None for cell in cells] for cells in data["rows"]])
+
+
+class ImageRef:
+    """A picture in the content-addressed image store; boilerplate is "layout" for a layout's logo and the like."""
+
+    __slots__ = ("sha1", "ext", "boilerplate")
+
+    def __init__(self, sha1, ext, boilerplate=None):
+        self.sha1 = sha1
+        self.ext = ext
+        self.boilerplate = boilerplate
+
+    @property
+    def filename(self):
+        return f"{self.sha1}.{self.ext}"
+
+    def to_dict(self):
+        data = {"sha1": self.sha1, "ext": self.ext}
+        if self.boilerplate:
+            data["boilerplate"] = self.boilerplate
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["sha1"], data["ext"], data.get("boilerplate"))
+
+
+class Slide:
+    __slots__ = ("slide_number", "title", "paragraphs", "tables", "images")
+
+    def __init__(self, slide_number, title, paragraphs=None, tables=None, images=None):
+        self.slide_number = slide_number
+        self.title = title
+        self.paragraphs = paragraphs if paragraphs is not None else []
+        self.tables = tables if tables is not None else []
+        self.images = images if images is not None else []
+
+    def to_dict(self):
+        return {
+            "slide_number": self.slide_number,
+            "title": self.title,
+            "paragraphs": [paragraph.to_dict() for paragraph in self.paragraphs],
+            "tables": [table.to_dict() for table in self.tables],
+            "images": [image.to_dict() for image in self.images],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["slide_number"],
+            data["title"],
+            [Paragraph.from_dict(paragraph) for paragraph in data["paragraphs"]],
+            [Table.from_dict(table) for table in data["tables"]],
+            [ImageRef.from_dict(image) for image in data["images"]],
+        )
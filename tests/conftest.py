@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from parse_cache import ParseCache  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """The app module with its uploads, image store, parse cache and search index under tmp_path."""
+    for key, name in (("UPLOAD_FOLDER", "uploads"), ("IMAGE_STORE_DIR", "images")):
+        os.makedirs(tmp_path / name)
+        monkeypatch.setitem(app_module.app.config, key, str(tmp_path / name))
+    monkeypatch.setitem(app_module.app.config, "JANITOR_ENABLED", False)
+    monkeypatch.setattr(app_module, "parse_cache", ParseCache(str(tmp_path / "cache"), app_module.PARSER_VERSION))
+    monkeypatch.setattr(app_module, "search_index", SearchIndex(str(tmp_path / "search.sqlite3")))
+    return app_module
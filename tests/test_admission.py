@@ -0,0 +1,70 @@
+import threading
+
+import pytest
+
+from admission import AdmissionController, Overloaded
+
+
+def test_grants_up_to_max_active_at_once():
+    admission = AdmissionController(max_active=2, max_queued=4)
+    first, second, third = (admission.enqueue("a") for _ in range(3))
+    assert first.granted and second.granted
+    assert not third.granted
+    admission.release(first)
+    assert third.granted
+
+
+def test_queued_clients_take_turns():
+    admission = AdmissionController(max_active=1, max_queued=8)
+    running = admission.enqueue("a")
+    queued = [admission.enqueue(client) for client in "aaaab"]
+    order = []
+    current = running
+    for _ in queued:
+        admission.release(current)
+        current = next(ticket for ticket in queued if ticket.granted and ticket not in order)
+        order.append(current)
+    assert [ticket.client for ticket in order] == list("abaaa")
+
+
+def test_full_queue_is_refused():
+    admission = AdmissionController(max_active=1, max_queued=1)
+    admission.enqueue("a")
+    admission.enqueue("a")
+    with pytest.raises(Overloaded) as excinfo:
+        admission.enqueue("b")
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after >= 1
+
+
+def test_wait_timeout_leaves_the_queue():
+    admission = AdmissionController(max_active=1, max_queued=1)
+    running = admission.enqueue("a")
+    with pytest.raises(Overloaded) as excinfo:
+        admission.acquire("b", timeout=0.05)
+    assert excinfo.value.reason == "timeout"
+    # The timed-out ticket gave its queue place back
+    admission.enqueue("c")
+    admission.release(running)
+
+
+def test_release_is_idempotent():
+    admission = AdmissionController(max_active=1, max_queued=1)
+    ticket = admission.acquire("a")
+    admission.release(ticket)
+    admission.release(ticket)
+    other = admission.acquire("b", timeout=0)
+    assert other.granted
+    assert not admission.enqueue("c").granted
+
+
+def test_waiter_is_woken_by_release():
+    waits = []
+    admission = AdmissionController(max_active=1, max_queued=1, on_wait=waits.append)
+    running = admission.acquire("a")
+    thread = threading.Thread(target=admission.acquire, args=("b", 5))
+    thread.start()
+    admission.release(running)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(waits) == 2
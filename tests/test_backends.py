@@ -0,0 +1,141 @@
+import copy
+import struct
+from zipfile import ZipFile
+
+import pytest
+from pptx import Presentation
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.enum.shapes import PP_PLACEHOLDER
+from pptx.util import Inches
+
+from benchmarks.synthetic import generate_deck
+
+
+def _structure_deck(path):
+    """Slides with nested groups, a merged table and hyperlinked runs."""
+    prs = Presentation()
+    layout = prs.slide_layouts[5]  # Title Only
+
+    slide = prs.slides.add_slide(layout)
+    slide.shapes.title.text = "Groups"
+    outer = slide.shapes.add_group_shape()
+    outer.shapes.add_textbox(0, 0, Inches(2), Inches(1)).text_frame.text = "outer"
+    inner = outer.shapes.add_group_shape()
+    inner.shapes.add_textbox(0, Inches(1), Inches(2), Inches(1)).text_frame.text = "inner"
+    slide.shapes.add_textbox(0, Inches(3), Inches(2), Inches(1)).text_frame.text = "after"
+
+    slide = prs.slides.add_slide(layout)
+    slide.shapes.title.text = "Merged"
+    table = slide.shapes.add_table(3, 3, 0, Inches(2), Inches(6), Inches(2)).table
+    for row_idx, row in enumerate(table.rows):
+        for col_idx, cell in enumerate(row.cells):
+            cell.text = f"r{row_idx}c{col_idx}"
+    table.cell(0, 0).merge(table.cell(0, 1))
+    table.cell(1, 2).merge(table.cell(2, 2))
+
+    slide = prs.slides.add_slide(layout)
+    slide.shapes.title.text = "Links"
+    paragraph = slide.shapes.add_textbox(0, Inches(2), Inches(4), Inches(1)).text_frame.paragraphs[0]
+    run = paragraph.add_run()
+    run.text = "Example"
+    run.hyperlink.address = "https://example.com/a?b=1"
+    paragraph.add_run().text = " plain"
+
+    prs.save(path)
+    return path
+
+
+def _parse_both(app, path):
+    return [
+        [slide.to_dict() for slide in app.parse_pptx(path, backend=backend)]
+        for backend in ("pptx", "xml")
+    ]
+
+
+@pytest.mark.parametrize("options", [
+    {"slides": 5},
+    {"slides": 3, "table_rows": 4, "table_cols": 3, "images": 2, "image_size": 32},
+])
+def test_backends_agree_on_synthetic_decks(app, tmp_path, options):
+    pptx, xml = _parse_both(app, generate_deck(str(tmp_path / "deck.pptx"), **options))
+    assert pptx == xml
+
+
+def test_backends_agree_on_groups_merged_tables_and_links(app, tmp_path):
+    pptx, xml = _parse_both(app, _structure_deck(str(tmp_path / "structure.pptx")))
+    assert pptx == xml
+    groups, merged, links = pptx
+    assert [paragraph["runs"][0]["text"] for paragraph in groups["paragraphs"]] == ["outer", "inner", "after"]
+    assert merged["tables"][0]["rows"][0][:2] == [["r0c0\nr0c1", 1, 2], None]
+    assert links["paragraphs"][0]["runs"][0]["link"] == "https://example.com/a?b=1"
+
+
+def test_backends_skip_charts(app, tmp_path):
+    prs = Presentation()
+    slide = prs.slides.add_slide(prs.slide_layouts[5])
+    slide.shapes.title.text = "Chart"
+    chart_data = CategoryChartData()
+    chart_data.categories = ["a", "b"]
+    chart_data.add_series("Series 1", (1, 2))
+    chart = slide.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED, 0, 0, Inches(4), Inches(3), chart_data).chart
+    chart.has_title = True
+    chart.chart_title.text_frame.text = "Sales"
+    path = str(tmp_path / "chart.pptx")
+    prs.save(path)
+
+    pptx, xml = _parse_both(app, path)
+    assert pptx == xml
+    assert pptx[0]["title"] == "Chart"
+    assert not pptx[0]["paragraphs"] and not pptx[0]["tables"] and not pptx[0]["images"]
+
+
+def _emf_deck(path):
+    """A one-picture deck whose picture part is ppt/media/image1.emf, as PowerPoint names clip art."""
+    png = generate_deck(path + ".png.pptx", slides=1, images=1, image_size=16)
+    header = struct.pack(
+        "<II4i4i4sIIIHHIIII", 1, 88, 0, 0, 99, 99, 0, 0, 2646, 2646, b" EMF", 0x10000, 108, 2, 0, 0, 0, 0, 0, 0
+    ).ljust(88, b"\0")
+    emf = header + struct.pack("<IIIII", 14, 20, 0, 16, 20)
+    with ZipFile(png) as src, ZipFile(path, "w") as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name == "ppt/media/image1.png":
+                name, data = "ppt/media/image1.emf", emf
+            elif name == "ppt/slides/_rels/slide1.xml.rels":
+                data = data.replace(b"image1.png", b"image1.emf")
+            elif name == "[Content_Types].xml":
+                data = data.replace(b"<Default ", b'<Default Extension="emf" ContentType="image/x-emf"/><Default ', 1)
+            dst.writestr(name, data)
+    return path
+
+
+def test_backends_agree_on_emf_pictures(app, tmp_path):
+    pptx, xml = _parse_both(app, _emf_deck(str(tmp_path / "emf.pptx")))
+    assert pptx == xml
+    assert [image["ext"] for image in pptx[0]["images"]] == ["wmf"]
+
+
+def _field_only_deck(path):
+    """One slide with date and slide number placeholders, whose paragraphs hold only a:fld elements."""
+    prs = Presentation()
+    layout = prs.slide_layouts[1]
+    slide = prs.slides.add_slide(layout)
+    slide.shapes.title.text = "Fields"
+    slide.placeholders[1].text = "Body"
+    for placeholder in layout.placeholders:
+        if placeholder.placeholder_format.type in (PP_PLACEHOLDER.DATE, PP_PLACEHOLDER.SLIDE_NUMBER):
+            slide.shapes._spTree.append(copy.deepcopy(placeholder._element))
+    prs.save(path)
+    return path
+
+
+def test_backends_agree_on_field_placeholders(app, tmp_path):
+    pptx, xml = _parse_both(app, _field_only_deck(str(tmp_path / "fields.pptx")))
+    assert pptx == xml
+
+
+@pytest.mark.parametrize("backend", ["pptx", "xml"])
+def test_paragraphs_of_only_fields_are_skipped(app, tmp_path, backend):
+    slides = app.parse_pptx(_field_only_deck(str(tmp_path / "fields.pptx")), backend=backend)
+    assert [paragraph.text for paragraph in slides[0].paragraphs] == ["Body"]
@@ -0,0 +1,77 @@
+import hashlib
+import shutil
+
+import pytest
+from pptx import Presentation
+
+from benchmarks.synthetic import generate_deck
+
+
+def _store(app, path):
+    """Store a deck as an upload would, returning its deck id."""
+    with open(path, "rb") as fh:
+        deck_id = hashlib.sha256(fh.read()).hexdigest()
+    shutil.copyfile(path, app.deck_path(deck_id))
+    return deck_id
+
+
+def _reparsed_indices(app, monkeypatch):
+    """Record the slide indices parse_revision hands to parse_slides_at."""
+    calls = []
+    parse_slides_at = app.parse_slides_at
+
+    def spy(filepath, indices, *args, **kwargs):
+        calls.extend(indices)
+        return parse_slides_at(filepath, indices, *args, **kwargs)
+
+    monkeypatch.setattr(app, "parse_slides_at", spy)
+    return calls
+
+
+def _dicts(slides):
+    return [slide.to_dict() for slide in slides]
+
+
+@pytest.mark.parametrize("backend", ["pptx", "xml"])
+def test_reupload_reparses_only_the_edited_slide(app, monkeypatch, tmp_path, backend):
+    original = generate_deck(str(tmp_path / "v1.pptx"), slides=4, images=1, image_size=16)
+    prs = Presentation(original)
+    prs.slides[2].placeholders[1].text_frame.paragraphs[0].runs[0].text = "Edited"
+    edited = str(tmp_path / "v2.pptx")
+    prs.save(edited)
+
+    old_id = _store(app, original)
+    app.parse_deck(app.deck_path(old_id), old_id, backend, filename="talk.pptx")
+    reparsed = _reparsed_indices(app, monkeypatch)
+    new_id = _store(app, edited)
+    slides = app.parse_deck(app.deck_path(new_id), new_id, backend, filename="talk.pptx")
+
+    assert reparsed == [2]
+    assert slides[2].paragraphs[0].runs[0].text == "Edited"
+    assert _dicts(slides) == _dicts(app.parse_pptx(app.deck_path(new_id), backend=backend))
+
+
+def test_removed_slide_renumbers_reused_ones(app, monkeypatch, tmp_path):
+    prs = Presentation(generate_deck(str(tmp_path / "base.pptx"), slides=5))
+    for slide in list(prs.slides)[3:]:
+        slide.shapes.title.text = ""  # falls back to "Slide N"
+    original = str(tmp_path / "v1.pptx")
+    prs.save(original)
+    first = prs.slides._sldIdLst[0]
+    prs.part.drop_rel(first.rId)
+    prs.slides._sldIdLst.remove(first)
+    trimmed = str(tmp_path / "v2.pptx")
+    prs.save(trimmed)
+
+    old_id = _store(app, original)
+    app.parse_deck(app.deck_path(old_id), old_id, "xml", filename="v1.pptx")
+    reparsed = _reparsed_indices(app, monkeypatch)
+    new_id = _store(app, trimmed)
+    # Uploaded under a new name, so the previous revision is found by its titles
+    slides = app.parse_deck(app.deck_path(new_id), new_id, "xml", filename="v2.pptx")
+
+    assert reparsed == []
+    assert [slide.title for slide in slides] == [
+        "Synthetic slide 2", "Synthetic slide 3", "Slide 3", "Slide 4",
+    ]
+    assert _dicts(slides) == _dicts(app.parse_pptx(app.deck_path(new_id), backend="xml"))
@@ -0,0 +1,61 @@
+import os
+import threading
+import time
+
+from janitor import Janitor
+
+
+def _old_file(path, size, age):
+    with open(path, "wb") as fh:
+        fh.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+
+
+def test_sweep_applies_age_then_size_quota(tmp_path):
+    uploads, images = tmp_path / "uploads", tmp_path / "images"
+    uploads.mkdir()
+    images.mkdir()
+    _old_file(uploads / "ancient.pptx", 10, age=1000)
+    _old_file(uploads / "old.pptx", 10, age=500)
+    _old_file(images / "kept.png", 10, age=400)
+    _old_file(images / "referenced.png", 10, age=2000)
+    _old_file(uploads / "fresh.pptx", 10, age=0)
+    janitor = Janitor(
+        {"uploads": str(uploads), "images": str(images)},
+        lambda: {"referenced.png"},
+        max_bytes=30, max_age=900, grace=60,
+    )
+    report = janitor.sweep()
+    removed = {os.path.basename(path): reason for path, _, reason in report.removed}
+    assert removed == {"ancient.pptx": "age", "old.pptx": "size"}
+    assert sorted(os.listdir(uploads)) == ["fresh.pptx"]
+
+
+def test_dry_run_only_reports(tmp_path):
+    _old_file(tmp_path / "old.pptx", 10, age=1000)
+    janitor = Janitor({"uploads": str(tmp_path)}, set, max_age=10, grace=0, dry_run=True)
+    assert [reason for _, _, reason in janitor.sweep().removed] == ["age"]
+    assert os.listdir(tmp_path) == ["old.pptx"]
+
+
+def test_start_does_not_wait_for_a_running_sweep(tmp_path):
+    sweeping, finish = threading.Event(), threading.Event()
+
+    def slow_references():
+        sweeping.set()
+        finish.wait(5)
+        return set()
+
+    janitor = Janitor({"images": str(tmp_path)}, slow_references, interval=3600)
+    _old_file(tmp_path / "a.png", 1, age=0)
+    sweep = threading.Thread(target=janitor.sweep)
+    sweep.start()
+    assert sweeping.wait(5)
+    started = time.monotonic()
+    janitor.start()
+    janitor.start()
+    assert time.monotonic() - started < 1
+    finish.set()
+    sweep.join(5)
+    janitor.stop()
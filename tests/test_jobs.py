@@ -0,0 +1,67 @@
+import threading
+
+from admission import AdmissionController
+from jobs import JobQueue
+
+
+def _wait_finished(queue, job):
+    version = None
+    while not job.finished:
+        version = queue.wait(job, version, timeout=5)
+    return job
+
+
+def test_result_and_progress():
+    queue = JobQueue(max_workers=1)
+
+    def work(progress):
+        progress(1, 2)
+        progress(2, 2)
+        return "result"
+
+    job = _wait_finished(queue, queue.submit(work))
+    assert (job.status, job.result, job.done, job.total) == ("done", "result", 2, 2)
+
+
+def test_failure_is_recorded():
+    queue = JobQueue(max_workers=1)
+
+    def work(progress):
+        raise ValueError("bad deck")
+
+    job = _wait_finished(queue, queue.submit(work))
+    assert (job.status, job.error) == ("failed", "bad deck")
+
+
+def test_jobs_with_one_key_share_the_unfinished_job():
+    shared = []
+    queue = JobQueue(max_workers=2, on_share=shared.append)
+    release = threading.Event()
+    calls = []
+
+    def work(progress):
+        calls.append(1)
+        release.wait(5)
+        return len(calls)
+
+    first = queue.submit(work, key="deck")
+    second = queue.submit(work, key="deck")
+    assert second is first
+    assert shared == ["deck"]
+    release.set()
+    _wait_finished(queue, first)
+    # Once finished, the key starts a new job
+    third = _wait_finished(queue, queue.submit(work, key="deck"))
+    assert third is not first
+    assert calls == [1, 1]
+
+
+def test_jobs_wait_for_an_admission_turn():
+    admission = AdmissionController(max_active=1, max_queued=4)
+    queue = JobQueue(admission=admission)
+    held = admission.acquire("other")
+    job = queue.submit(lambda progress: "ran", client="client")
+    assert queue.wait(job, job.version, timeout=0.2) == 0
+    assert job.status == "queued"
+    admission.release(held)
+    assert _wait_finished(queue, job).result == "ran"
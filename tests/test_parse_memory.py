@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from benchmarks import memory
+from benchmarks.synthetic import generate_deck
+
+
+def _set_budget(app, monkeypatch, budget, workers=4):
+    monkeypatch.setitem(app.app.config, "PARSE_MEMORY_BUDGET", budget)
+    monkeypatch.setitem(app.app.config, "PARSE_WORKERS", workers)
+
+
+def test_pool_workers_fit_the_budget_together(app, monkeypatch):
+    _set_budget(app, monkeypatch, 1000)
+    assert app.pool_workers({"pptx": 100, "xml": 10}) == 4
+    assert app.pool_workers({"pptx": 400, "xml": 10}) == 2
+    assert app.pool_workers({"pptx": 900, "xml": 10}) == 1
+
+
+def test_deck_that_fits_only_one_load_is_parsed_in_process(app, monkeypatch, tmp_path):
+    path = generate_deck(str(tmp_path / "deck.pptx"), slides=4)
+    estimate = app.memory_estimate(path)
+    _set_budget(app, monkeypatch, estimate["pptx"] * 3 // 2)
+    monkeypatch.setitem(app.app.config, "PARALLEL_SLIDE_THRESHOLD", 1)
+
+    def no_pool():
+        raise AssertionError("used the process pool")
+
+    monkeypatch.setattr(app, "_get_parse_executor", no_pool)
+    slides = app.parse_pptx(path, backend="pptx")
+    assert [slide.title for slide in slides] == [f"Synthetic slide {n}" for n in range(1, 5)]
+
+
+class _BrokenPool:
+    """Stands in for a pool one of whose workers was killed."""
+
+    def __init__(self):
+        self.shut_down = False
+
+    def map(self, *args):
+        raise BrokenProcessPool("a worker died")
+
+    def shutdown(self, wait=True):
+        self.shut_down = True
+
+
+def test_broken_pool_is_dropped_and_the_deck_parsed_in_process(app, monkeypatch, tmp_path):
+    path = generate_deck(str(tmp_path / "deck.pptx"), slides=4)
+    _set_budget(app, monkeypatch, app.memory_estimate(path)["pptx"] * 4)
+    monkeypatch.setitem(app.app.config, "PARALLEL_SLIDE_THRESHOLD", 1)
+    pool = _BrokenPool()
+    monkeypatch.setattr(app, "_parse_executor", pool)
+
+    slides = app.parse_pptx(path, backend="pptx")
+    assert [slide.title for slide in slides] == [f"Synthetic slide {n}" for n in range(1, 5)]
+    assert pool.shut_down
+    assert app._parse_executor is None
+
+
+def test_concurrent_parses_share_one_pool(app, monkeypatch):
+    created = []
+
+    def slow_pool(**kwargs):
+        time.sleep(0.05)
+        created.append(kwargs)
+        return object()
+
+    monkeypatch.setattr(app, "_parse_executor", None)
+    monkeypatch.setattr(app, "ProcessPoolExecutor", slow_pool)
+    threads = [threading.Thread(target=app._get_parse_executor) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="peak RSS is read from Linux's /proc")
+def test_xml_backend_peak_rss_stays_flat_as_images_grow(tmp_path):
+    growth = {}
+    for count in (8, 64):
+        deck = generate_deck(str(tmp_path / f"images-{count}.pptx"), slides=count, bullets=2, images=1, image_size=256)
+        result = memory._measure(deck, "xml", 0, str(tmp_path))
+        assert result["images"] == count
+        growth[count] = result["rss_growth_kb"]
+    assert growth[64] - growth[8] <= memory.TOLERANCE_KB
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController
+from benchmarks.synthetic import generate_deck
+from jobs import JobQueue
+from singleflight import SingleFlight
+
+
+@pytest.fixture
+def one_turn(app, monkeypatch):
+    """A server with JOB_WORKERS=1: one parse turn shared by jobs and requests."""
+    admission = AdmissionController(max_active=1, max_queued=8)
+    monkeypatch.setattr(app, "parse_admission", admission)
+    monkeypatch.setattr(app, "parse_flights", SingleFlight())
+    monkeypatch.setattr(app, "job_queue", JobQueue(admission=admission))
+    monkeypatch.setitem(app.app.config, "PARSE_QUEUE_TIMEOUT", 5)
+    return admission
+
+
+def _stored_deck(app, tmp_path):
+    path = generate_deck(str(tmp_path / "deck.pptx"), slides=3)
+    with open(path, "rb") as fh:
+        data = fh.read()
+    deck_id = hashlib.sha256(data).hexdigest()
+    with open(app.deck_path(deck_id), "wb") as fh:
+        fh.write(data)
+    return deck_id
+
+
+def _wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_request_waiting_for_a_turn_does_not_block_a_job_parsing_the_deck(app, one_turn, tmp_path):
+    # A job is queued for the deck, then an API request for it queues behind
+    # the job; the request must not lead the parse while it waits, or the job
+    # would hold the only turn while waiting on the request
+    deck_id = _stored_deck(app, tmp_path)
+    blocker = one_turn.acquire("someone else")
+    job = app.job_queue.submit(
+        app.parse_and_cache, app.deck_path(deck_id), deck_id, "pptx", key=deck_id, client="uploader",
+    )
+    responses = []
+    request = threading.Thread(
+        target=lambda: responses.append(app.app.test_client().get(f"/api/decks/{deck_id}"))
+    )
+    request.start()
+    _wait_until(lambda: one_turn._queued == 2)
+    one_turn.release(blocker)
+
+    request.join(10)
+    assert not request.is_alive()
+    version = None
+    while not job.finished:
+        version = app.job_queue.wait(job, version, timeout=5)
+    assert job.status == "done", job.error
+    assert responses[0].status_code == 200
+    assert responses[0].get_json()["slide_count"] == 3
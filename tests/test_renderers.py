@@ -0,0 +1,21 @@
+from renderers import column_widths, table_to_html
+from slide_ir import Table
+
+
+def test_column_widths_follow_the_longest_cell():
+    table = Table([[("a", 1, 1), ("abc", 1, 1)], [("", 1, 1), ("x", 1, 1)]])
+    assert column_widths(table) == [25.0, 75.0]
+
+
+def test_merged_cell_widens_every_column_it_spans():
+    table = Table([
+        [("label", 1, 1), ("merged header", 1, 2), None],
+        [("first", 1, 1), ("", 1, 1), ("", 1, 1)],
+    ])
+    widths = column_widths(table)
+    assert widths[1] == widths[2] > 0
+    assert "width:0.0%" not in table_to_html(table)
+
+
+def test_empty_table_columns_share_the_width():
+    assert column_widths(Table([[("", 1, 1), ("", 1, 1), ("", 1, 1)]])) == [100 / 3] * 3
@@ -0,0 +1,180 @@
+import hashlib
+import io
+import os
+import random
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED, ZIP_STORED
+
+import pytest
+
+from benchmarks.synthetic import generate_deck
+
+UNKNOWN_DECK = "0" * 64
+
+
+@pytest.fixture
+def client(app):
+    return app.app.test_client()
+
+
+def test_export_of_unknown_deck_is_404_without_a_parse_turn(app, client, monkeypatch):
+    def no_turn(*args, **kwargs):
+        raise AssertionError("took a parse turn")
+
+    monkeypatch.setattr(app.parse_admission, "acquire", no_turn)
+    assert client.get(f"/deck/{UNKNOWN_DECK}/export.docx").status_code == 404
+
+
+def test_missing_deck_is_an_invalid_deck(app):
+    with pytest.raises(app.InvalidDeckError):
+        app.fit_backend(app.deck_path(UNKNOWN_DECK), "pptx")
+    with pytest.raises(app.InvalidDeckError):
+        app.open_xml_deck(app.deck_path(UNKNOWN_DECK))
+
+
+def test_corrupt_xml_is_an_invalid_deck(app, tmp_path):
+    path = tmp_path / "corrupt.pptx"
+    path.write_bytes(_corrupt_xml_deck(tmp_path))
+    with pytest.raises(app.InvalidDeckError):
+        app.open_xml_deck(str(path))
+    with pytest.raises(app.InvalidDeckError):
+        app.deck_slide_count(str(path))
+
+
+def _parsed_deck(app, tmp_path):
+    path = generate_deck(str(tmp_path / "deck.pptx"), slides=2, images=1, image_size=16)
+    with open(path, "rb") as fh:
+        deck_id = hashlib.sha256(fh.read()).hexdigest()
+    app.cache_deck(deck_id, app.parse_pptx(path, backend="xml"))
+    return deck_id
+
+
+def test_page_hits_keep_the_parsed_slides_recently_used(app, client, tmp_path):
+    deck_id = _parsed_deck(app, tmp_path)
+    assert client.get(f"/deck/{deck_id}").status_code == 200
+    slides_path = app.parse_cache._path(app.parse_cache.key_for(deck_id))
+    os.utime(slides_path, (0, 0))
+    assert client.get(f"/deck/{deck_id}").status_code == 200
+    assert os.path.getmtime(slides_path) > 0
+
+
+def test_page_is_not_served_once_its_slides_are_evicted(app, client, tmp_path):
+    deck_id = _parsed_deck(app, tmp_path)
+    assert client.get(f"/deck/{deck_id}").status_code == 200
+    os.remove(app.parse_cache._path(app.parse_cache.key_for(deck_id)))
+    assert app.deck_page(deck_id, "gzip") is None
+
+
+def _not_a_zip(tmp_path):
+    return b"not a zip" * 100
+
+
+def _zip_of_text(tmp_path):
+    """A valid zip that isn't a deck: no [Content_Types].xml, no presentation.xml."""
+    buffer = io.BytesIO()
+    with ZipFile(buffer, "w") as zf:
+        zf.writestr("notes.txt", "not a deck")
+    return buffer.getvalue()
+
+
+def _corrupt_xml_deck(tmp_path):
+    """A deck whose ppt/presentation.xml is cut off mid-tag."""
+    path = generate_deck(str(tmp_path / "deck.pptx"), slides=2, images=1, image_size=16)
+    buffer = io.BytesIO()
+    with ZipFile(path) as src, ZipFile(buffer, "w") as dst:
+        for info in src.infolist():
+            data = src.read(info)
+            dst.writestr(info, data[:40] if info.filename == "ppt/presentation.xml" else data)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("mode, bad_deck", [
+    ({}, _not_a_zip),
+    ({"lazy": "1"}, _not_a_zip),
+    ({"stream": "1"}, _not_a_zip),
+    ({}, _corrupt_xml_deck),
+    ({"lazy": "1"}, _corrupt_xml_deck),
+    ({"stream": "1"}, _zip_of_text),
+    ({"stream": "1"}, _corrupt_xml_deck),
+])
+def test_invalid_upload_is_not_kept(app, client, tmp_path, mode, bad_deck):
+    data = bad_deck(tmp_path)
+    # Closed as a WSGI server would: a streamed upload holds its parse turn until then
+    with client.post("/upload", data={"file": (io.BytesIO(data), "bad.pptx"), **mode}) as response:
+        assert response.status_code == 302
+    assert not os.path.exists(app.deck_path(hashlib.sha256(data).hexdigest()))
+
+
+@pytest.mark.parametrize("bad_deck", [_not_a_zip, _corrupt_xml_deck])
+def test_invalid_api_upload_is_not_kept(app, client, tmp_path, bad_deck):
+    data = bad_deck(tmp_path)
+    response = client.post("/api/decks", data={"file": (io.BytesIO(data), "bad.pptx")})
+    assert response.status_code == 400
+    assert not os.path.exists(app.deck_path(hashlib.sha256(data).hexdigest()))
+
+
+@pytest.mark.parametrize("bad_deck", [_not_a_zip, _corrupt_xml_deck])
+def test_inspect_rejects_invalid_deck(client, tmp_path, bad_deck):
+    response = client.post("/api/inspect", data={"file": (io.BytesIO(bad_deck(tmp_path)), "bad.pptx")})
+    assert response.status_code == 400
+
+
+def test_search_forgets_decks_that_are_gone(app, client, tmp_path):
+    deck_id = _parsed_deck(app, tmp_path)
+    hits = client.get("/search?q=synthetic", headers={"Accept": "application/json"}).get_json()["hits"]
+    assert {hit["deck_id"] for hit in hits} == {deck_id}
+
+    os.remove(app.parse_cache._path(app.parse_cache.key_for(deck_id)))
+    hits = client.get("/search?q=synthetic", headers={"Accept": "application/json"}).get_json()["hits"]
+    assert hits == []
+    assert app.search_index.search("synthetic") == []
+
+
+def _media_deck(app, tmp_path):
+    """A stored deck with a stored video and a deflated picture spanning several inflate chunks."""
+    path = generate_deck(str(tmp_path / "media.pptx"), slides=1)
+    rng = random.Random(0)
+    video = rng.randbytes(100_000)
+    picture = rng.randbytes(app.MEDIA_CHUNK_SIZE) + b"\0" * app.MEDIA_CHUNK_SIZE * 2
+    with ZipFile(path, "a") as zf:
+        info = ZipInfo("ppt/media/media1.mp4")
+        info.extra = b"\xfe\xca\x04\x00pad!"  # shifts the data past a longer local header
+        zf.writestr(info, video, compress_type=ZIP_STORED)
+        zf.writestr("ppt/media/image9.png", picture, compress_type=ZIP_DEFLATED)
+    with open(path, "rb") as fh:
+        data = fh.read()
+    deck_id = hashlib.sha256(data).hexdigest()
+    with open(app.deck_path(deck_id), "wb") as fh:
+        fh.write(data)
+    return deck_id, video, picture
+
+
+def test_stored_media_part_honours_ranges(app, client, tmp_path):
+    deck_id, video, _ = _media_deck(app, tmp_path)
+    response = client.get(f"/deck/{deck_id}/media/media1.mp4", headers={"Range": "bytes=1000-1999"})
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 1000-1999/{len(video)}"
+    assert response.data == video[1000:2000]
+
+
+def test_deflated_media_part_is_inflated_whole(app, client, tmp_path):
+    deck_id, _, picture = _media_deck(app, tmp_path)
+    response = client.get(f"/deck/{deck_id}/media/image9.png")
+    assert response.status_code == 200
+    assert response.mimetype == "image/png"
+    assert response.data == picture
+
+
+def test_unknown_media_part_is_404(app, client, tmp_path):
+    deck_id, _, _ = _media_deck(app, tmp_path)
+    assert client.get(f"/deck/{deck_id}/media/nope.png").status_code == 404
+    assert client.get(f"/deck/{UNKNOWN_DECK}/media/media1.mp4").status_code == 404
+
+
+def test_serving_an_image_marks_it_recently_used(app, client):
+    path = os.path.join(app.app.config["IMAGE_STORE_DIR"], "ab.png")
+    with open(path, "wb") as fh:
+        fh.write(b"png")
+    os.utime(path, (0, 0))
+    with client.get("/images/ab.png") as response:
+        assert response.status_code == 200
+    assert os.path.getmtime(path) > 0
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _start_followers(flights, key, count, results):
+    threads = [
+        threading.Thread(target=lambda: results.append(flights.do(key, lambda: "follower ran")))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_concurrent_calls_share_one_run():
+    shared = []
+    flights = SingleFlight(on_share=shared.append)
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", work)))
+    leader.start()
+    while not calls:
+        pass
+    followers = _start_followers(flights, "k", 3, results)
+    while len(shared) < 3:
+        pass
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+    assert calls == [1]
+    assert results == ["value"] * 4
+
+
+def test_error_is_raised_in_every_caller():
+    flights = SingleFlight()
+    flight = flights.begin("k")
+    errors = []
+
+    def follow():
+        try:
+            flights.do("k", lambda: "unused")
+        except ValueError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=follow)
+    thread.start()
+    flight.finish(error=ValueError("boom"))
+    thread.join(5)
+    assert [str(exc) for exc in errors] == ["boom"]
+
+
+def test_abandoned_flight_is_run_by_a_follower():
+    flights = SingleFlight()
+    flight = flights.begin("k")
+    results = []
+    threads = _start_followers(flights, "k", 1, results)
+    flight.abandon()
+    threads[0].join(5)
+    assert results == ["follower ran"]
+
+
+def test_join_returns_default_when_nothing_is_in_flight():
+    flights = SingleFlight()
+    assert flights.join("k", "default") == "default"
+    assert flights.begin("k") is not None
+    assert flights.begin("k") is None
+
+
+def test_track_finishes_with_the_items():
+    flights = SingleFlight()
+    flight = flights.begin("k")
+    assert list(flight.track(iter([1, 2, 3]))) == [1, 2, 3]
+    assert flight.result() == [1, 2, 3]
+    assert flights.join("k") is None
+
+
+def test_later_calls_run_afresh():
+    flights = SingleFlight()
+    assert flights.do("k", lambda: 1) == 1
+    assert flights.do("k", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flights.do("k", lambda: {}["missing"])
@@ -0,0 +1,94 @@
+import hashlib
+import io
+import os
+import tempfile
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class HashingUpload:
+    """Write-once buffer for an uploaded file that hashes bytes as Werkzeug streams them in.
+
+    The body stays in memory up to spool_threshold bytes, then spills to a
+    named temp file in spool_dir, so a large deck can later be renamed into
+    place instead of copied. Writing more than max_size bytes raises
+    RequestEntityTooLarge. Reads and seeks are delegated to the underlying
+    buffer, so the parser can open it like any file object.
+    """
+
+    def __init__(self, spool_dir, spool_threshold, max_size=None):
+        self.spool_dir = spool_dir
+        self.spool_threshold = spool_threshold
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._file = io.BytesIO()
+        self._temp_path = None
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size is not None and self.size > self.max_size:
+            raise RequestEntityTooLarge()
+        self._sha256.update(data)
+        if self._temp_path is None and self.size > self.spool_threshold:
+            self._rollover()
+        return self._file.write(data)
+
+    def _rollover(self):
+        fd, self._temp_path = tempfile.mkstemp(dir=self.spool_dir, suffix=".upload")
+        disk = os.fdopen(fd, "w+b")
+        disk.write(self._file.getvalue())
+        self._file = disk
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+    def persist(self, target):
+        """Store the upload at target: a rename if it spilled to disk, one write if still in memory."""
+        if self._temp_path is not None:
+            self._file.flush()
+            os.replace(self._temp_path, target)
+            self._temp_path = None
+        else:
+            try:
+                os.utime(target)  # same deck again; it counts as recently used
+                return
+            except FileNotFoundError:
+                pass
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target) or ".", suffix=".upload")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(self._file.getbuffer())
+            os.replace(tmp_path, target)
+
+    def detach(self):
+        """Hand the body's file object to the caller, rewound, so closing the request leaves it readable."""
+        body, self._file = self._file, io.BytesIO()
+        if self._temp_path is not None:
+            self._temp_path = None  # the caller now owns the spilled file too
+        body.seek(0)
+        return body
+
+    def close(self):
+        self._file.close()
+        if self._temp_path is not None:
+            try:
+                os.remove(self._temp_path)
+            except FileNotFoundError:
+                pass
+            self._temp_path = None
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class UploadRequest(Request):
+    """Request class that receives file parts into HashingUpload buffers."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return HashingUpload(
+            config["UPLOAD_FOLDER"],
+            config["UPLOAD_SPOOL_THRESHOLD"],
+            config["MAX_CONTENT_LENGTH"],
+        )
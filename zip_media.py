@@ -0,0 +1,95 @@
+import io
+import struct
+import zipfile
+import zlib
+
+MEDIA_PREFIX = "ppt/media/"
+# Read size when streaming a member; large enough that a long video isn't sent in tiny writes
+CHUNK_SIZE = 256 * 1024
+
+# Local file header: signature, versions, flags, method, times, CRC, sizes, then name and extra lengths
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+def build_media_index(filepath):
+    """Return {name under ppt/media/: [data offset, compressed size, size, method, CRC]} for a deck.
+
+    Offsets point past each member's local header, so a member can later be
+    read with one seek and no zip parsing. The list form keeps the index
+    JSON-serialisable for the parse cache. Raises zipfile.BadZipFile if
+    filepath is not a zip.
+    """
+    index = {}
+    with zipfile.ZipFile(filepath) as zf, open(filepath, "rb") as fh:
+        for info in zf.infolist():
+            if not info.filename.startswith(MEDIA_PREFIX) or info.is_dir():
+                continue
+            fh.seek(info.header_offset)
+            header = _LOCAL_HEADER.unpack(fh.read(_LOCAL_HEADER.size))
+            if header[0] != _LOCAL_HEADER_SIGNATURE:
+                raise zipfile.BadZipFile(f"Bad local header for {info.filename}")
+            # The local extra field need not match the central directory's, so use the local lengths
+            offset = info.header_offset + _LOCAL_HEADER.size + header[-2] + header[-1]
+            index[info.filename[len(MEDIA_PREFIX):]] = [
+                offset, info.compress_size, info.file_size, info.compress_type, info.CRC,
+            ]
+    return index
+
+
+class MemberSlice(io.RawIOBase):
+    """Read-only, seekable view of length bytes at offset in a file, i.e. one stored zip member.
+
+    Seeks are relative to the member, so Werkzeug's Range handling can use it
+    like a file of its own.
+    """
+
+    def __init__(self, filepath, offset, length):
+        super().__init__()
+        self._fh = open(filepath, "rb")
+        self._offset = offset
+        self._length = length
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            pos += self._pos
+        elif whence == io.SEEK_END:
+            pos += self._length
+        self._pos = max(0, min(pos, self._length))
+        return self._pos
+
+    def readinto(self, buffer):
+        size = min(len(buffer), self._length - self._pos)
+        if size <= 0:
+            return 0
+        self._fh.seek(self._offset + self._pos)
+        read = self._fh.readinto(memoryview(buffer)[:size])
+        self._pos += read
+        return read
+
+    def close(self):
+        self._fh.close()
+        super().close()
+
+
+def iter_inflated(filepath, offset, compressed_size, chunk_size=CHUNK_SIZE):
+    """Yield a deflated member's bytes in chunks, never holding the whole member in memory."""
+    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+    with MemberSlice(filepath, offset, compressed_size) as raw:
+        for chunk in iter(lambda: raw.read(chunk_size), b""):
+            data = inflater.decompress(chunk)
+            if data:
+                yield data
+    tail = inflater.flush()
+    if tail:
+        yield tail